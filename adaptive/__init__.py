@@ -2,11 +2,12 @@
 from .notebook_integration import (notebook_extension, live_plot,
                                    active_plotting_tasks)
 
+from . import cache
 from . import learner
 from . import runner
 
 from .learner import (Learner1D, Learner2D, AverageLearner,
                       BalancingLearner, DataSaver, IntegratorLearner)
-from .runner import Runner
+from .runner import Runner, Scheduler
 
 del notebook_integration  # to avoid confusion with `notebook_extension`
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import numbers
+import pickle
+import sqlite3
+
+import numpy as np
+
+
+def _normalize(x):
+    """Make equal points that are represented by different types
+    (e.g. 'float' and 'numpy.float64') pickle to the same bytes."""
+    if isinstance(x, (tuple, list, np.ndarray)):
+        return tuple(_normalize(i) for i in x)
+    elif isinstance(x, numbers.Integral):
+        return int(x)
+    elif isinstance(x, numbers.Real):
+        return float(x)
+    else:
+        return x
+
+
+class EvaluationCache:
+    """A persistent cache of function values, stored in an SQLite database.
+
+    The cache can be shared between runs and learners that learn the
+    same function; pass it as the 'cache' argument of the 'Runner'.
+    Points that are in the cache are then added to the learner without
+    being evaluated.
+
+    Parameters
+    ----------
+    fname : str
+        The database file. It is created if it does not exist.
+    maxsize : int, optional
+        The maximum number of values in the file (of all namespaces).
+        When exceeded, the least recently used values are removed.
+    namespace : str, default: ''
+        Distinguishes the values of different functions in the same file.
+
+    Attributes
+    ----------
+    hits, misses : int
+        The number of points that were, and were not, found in the cache.
+    """
+
+    # SQLite limits the number of parameters in a single query.
+    _max_query_size = 500
+
+    def __init__(self, fname, maxsize=None, namespace=''):
+        self.fname = fname
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self.hits = self.misses = 0
+        self._db = sqlite3.connect(fname)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS cache '
+                         '(key BLOB PRIMARY KEY, value BLOB, used INTEGER)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS used ON cache (used)')
+        self._db.commit()
+        used, = self._db.execute('SELECT MAX(used) FROM cache').fetchone()
+        self._used = used or 0
+        # The number of values, kept up to date by 'set_many', such
+        # that the table is not counted for every batch.
+        self._size = len(self)
+
+    def _key(self, x):
+        return pickle.dumps((self.namespace, _normalize(x)),
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get_many(self, points):
+        """Return a dict with the values of the 'points' that are cached."""
+        keys = {self._key(x): x for x in points}
+        found = {}
+        key_list = list(keys)
+        for i in range(0, len(key_list), self._max_query_size):
+            chunk = key_list[i:i + self._max_query_size]
+            query = ('SELECT key, value FROM cache WHERE key IN ({})'
+                     .format(', '.join('?' * len(chunk))))
+            for key, value in self._db.execute(query, chunk):
+                found[keys[key]] = pickle.loads(value)
+        if found:
+            # Mark the values as recently used.
+            self._used += 1
+            self._db.executemany('UPDATE cache SET used=? WHERE key=?',
+                                 ((self._used, self._key(x)) for x in found))
+            self._db.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, points, values):
+        """Store the 'values' of 'points' in the cache."""
+        self._used += 1
+        rows = [(self._key(x), pickle.dumps(y, pickle.HIGHEST_PROTOCOL),
+                 self._used) for x, y in zip(points, values)]
+        inserted = self._db.executemany(
+            'INSERT OR IGNORE INTO cache VALUES (?, ?, ?)', rows).rowcount
+        if inserted < len(rows):
+            # Some points were already in the cache.
+            self._db.executemany('UPDATE cache SET value=?, used=? WHERE key=?',
+                                 ((y, used, key) for key, y, used in rows))
+        self._size += inserted
+        if self.maxsize is not None:
+            excess = self._size - self.maxsize
+            if excess > 0:
+                deleted = self._db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key '
+                    'FROM cache ORDER BY used LIMIT ?)', (excess,)).rowcount
+                self._size -= deleted
+        self._db.commit()
+
+    def __getitem__(self, x):
+        try:
+            return self.get_many([x])[x]
+        except KeyError:
+            raise KeyError(x) from None
+
+    def __setitem__(self, x, y):
+        self.set_many([x], [y])
+
+    def __contains__(self, x):
+        query = 'SELECT 1 FROM cache WHERE key=?'
+        return self._db.execute(query, (self._key(x),)).fetchone() is not None
+
+    def __len__(self):
+        n, = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        return n
+
+    def close(self):
+        self._db.close()
@@ -18,6 +18,10 @@ class BalancingLearner(BaseLearner):
     ----------
     learners : sequence of BaseLearner
         The learners from which to choose. These must all have the same type.
+    cost_aware : bool, default: False
+        If True, the learners are compared by their loss improvement per
+        predicted second of evaluation, where the cost of a learner is
+        the mean evaluation time of its points (see 'add_cost').
 
     Notes
     -----
@@ -30,8 +34,9 @@ class BalancingLearner(BaseLearner):
     undefined way.
     """
 
-    def __init__(self, learners):
+    def __init__(self, learners, cost_aware=False):
         self.learners = learners
+        self._compare_costs = cost_aware
 
         # Naively we would make 'function' a method, but this causes problems
         # when using executors from 'concurrent.futures' because we have to
@@ -41,12 +46,38 @@ class BalancingLearner(BaseLearner):
 
         self._points = {}
         self._loss = {}
+        # The total evaluation time and number of evaluations per learner.
+        self._costs = [[0, 0] for _ in self.learners]
 
         if len(set(learner.__class__ for learner in self.learners)) > 1:
             raise TypeError('A BalacingLearner can handle only one type'
                             'of learners.')
 
+    @property
+    def accepts_unchosen_points(self):
+        return all(learner.accepts_unchosen_points
+                   for learner in self.learners)
+
+    @property
+    def cost_aware(self):
+        """Whether the costs are used, to compare the learners
+        or by the learners themselves."""
+        return self._compare_costs or any(learner.cost_aware
+                                          for learner in self.learners)
+
+    @property
+    def n(self):
+        return sum(learner.n for learner in self.learners)
+
+    def _learner_costs(self):
+        total = sum(cost for cost, _ in self._costs)
+        count = sum(count for _, count in self._costs)
+        mean_cost = total / count if count else 1
+        return [cost / count if count else mean_cost
+                for cost, count in self._costs]
+
     def _choose_and_add_points(self, n):
+        costs = self._learner_costs() if self._compare_costs else None
         points = []
         for _ in range(n):
             loss_improvements = []
@@ -56,7 +87,10 @@ class BalancingLearner(BaseLearner):
                     self._points[index] = learner.choose_points(
                         n=1, add_data=False)
                 point, loss_improvement = self._points[index]
-                loss_improvements.append(loss_improvement[0])
+                if costs is not None:
+                    loss_improvements.append(loss_improvement[0] / costs[index])
+                else:
+                    loss_improvements.append(loss_improvement[0])
                 pairs.append((index, point[0]))
             x, _ = max(zip(pairs, loss_improvements), key=itemgetter(1))
             points.append(x)
@@ -78,6 +112,15 @@ class BalancingLearner(BaseLearner):
         self._loss.pop(index, None)
         self.learners[index].add_point(x, y)
 
+    def add_cost(self, x, seconds):
+        index, x = x
+        seconds = max(seconds, 1e-9)
+        if self._compare_costs:
+            self._costs[index][0] += seconds
+            self._costs[index][1] += 1
+            self._points.pop(index, None)
+        self.learners[index].add_cost(x, seconds)
+
     def loss(self, real=True):
         losses = []
         for index, learner in enumerate(self.learners):
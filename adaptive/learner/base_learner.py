@@ -15,11 +15,20 @@ class BaseLearner(metaclass=abc.ABCMeta):
         'function' evaluated at certain points.
         The values can be 'None', which indicates that the point
         will be evaluated, but that we do not have the result yet.
+    cost_aware : bool
+        Whether the costs passed to 'add_cost' influence the points
+        that are chosen.
+    accepts_unchosen_points : bool
+        Whether 'add_point' accepts points that were not returned
+        by 'choose_points'.
 
     Subclasses may define a 'plot' method that takes no parameters
     and returns a holoviews plot.
     """
 
+    cost_aware = False
+    accepts_unchosen_points = False
+
     def add_data(self, xvalues, yvalues):
         """Add data to the learner.
 
@@ -43,6 +52,13 @@ class BaseLearner(metaclass=abc.ABCMeta):
         """Add a single datapoint to the learner."""
         pass
 
+    def add_cost(self, x, seconds):
+        """Record that evaluating the function at 'x' took 'seconds'.
+
+        Learners that can prefer cheap points over expensive ones
+        use this to predict the cost of new points; others ignore it.
+        """
+
     @abc.abstractmethod
     def remove_unfinished(self):
         """Remove uncomputed data from the learner."""
@@ -26,6 +26,9 @@ class DataSaver:
         self.extra_data = OrderedDict()
         self.function = learner.function
         self.arg_picker = arg_picker
+        self.cost_aware = getattr(learner, 'cost_aware', False)
+        self.accepts_unchosen_points = getattr(
+            learner, 'accepts_unchosen_points', False)
 
         # The methods a subclass of the BaseLearner needs to implement
         self.choose_points = self.learner.choose_points
@@ -34,6 +37,7 @@ class DataSaver:
 
         # Methods that the BaseLearner implements
         self.add_data = self.learner.add_data
+        self.add_cost = self.learner.add_cost
         self.__getstate__ = self.learner.__getstate__
         self.__setstate__ = self.learner.__setstate__
 
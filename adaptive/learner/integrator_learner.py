@@ -478,6 +478,10 @@ class IntegratorLearner(BaseLearner):
     def nr_points(self):
         return len(self.done_points)
 
+    @property
+    def n(self):
+        return self.nr_points
+
     @property
     def igral(self):
         return sum(i.igral for i in self.approximating_intervals)
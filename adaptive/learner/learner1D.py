@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
+import collections.abc
 from copy import deepcopy
+import functools
 import heapq
 import itertools
 import math
@@ -34,6 +36,290 @@ def _default_loss_per_interval(interval, scale, function_values):
     return loss
 
 
+def _default_loss_per_interval_vectorized(x_left, x_right, y_left, y_right,
+                                          scale):
+    """Calculate the loss of many intervals at once, like
+    '_default_loss_per_interval'."""
+    x_scale, y_scale = scale
+    dx = (x_right - x_left) / x_scale
+    if y_scale == 0:
+        return dx
+    dy = (y_right - y_left) / y_scale
+    if dy.ndim > 1:
+        return np.hypot(dx[:, None], dy).max(axis=1)
+    else:
+        return np.hypot(dx, dy)
+
+
+def _loss_from_vectorized(loss_per_interval_vectorized, interval, scale,
+                          function_values):
+    """Calculate the loss of a single interval with a vectorized loss."""
+    x_left, x_right = interval
+    y_left = np.array([function_values[x_left]])
+    y_right = np.array([function_values[x_right]])
+    loss, = loss_per_interval_vectorized(np.array([x_left]),
+                                         np.array([x_right]),
+                                         y_left, y_right, scale)
+    return loss
+
+
+# The number of points from which 'choose_points' divides the points over
+# the intervals in closed form, rather than one at a time.
+_min_closed_form_npoints = 32
+
+
+def _allocate_points(losses, n, order):
+    """Divide 'n' points over intervals, such that the largest loss per
+    subinterval, 'max(losses / (npoints + 1))', is minimal.
+
+    Equivalent to repeatedly adding a point to the interval with the
+    largest loss per subinterval, where ties go to the interval that
+    comes first in 'order'.
+
+    Parameters
+    ----------
+    losses : numpy array
+    n : int
+    order : numpy array
+
+    Returns
+    -------
+    npoints : numpy array of int
+        The number of points per interval.
+    """
+    total = losses.sum()
+    if n < _min_closed_form_npoints or not 0 < total < np.inf:
+        quals = [(-loss, key, i, 1)
+                 for i, (loss, key) in enumerate(zip(losses, order))]
+        heapq.heapify(quals)
+        for _ in range(n):
+            quality, key, i, m = quals[0]
+            heapq.heapreplace(quals, (quality * m / (m + 1), key, i, m + 1))
+        npoints = np.zeros(len(losses), int)
+        for _, _, i, m in quals:
+            npoints[i] = m - 1
+        return npoints
+
+    # Find the smallest threshold 'lam' at which the intervals need
+    # at most 'n' points, 'sum(floor(losses / lam)) <= n', by bisection.
+    # 'lo' needs at least 'n' points and 'hi' at most 'n'.
+    lo, hi = total / (n + len(losses)), total / n
+    while hi - lo > 1e-12 * hi:
+        lam = (lo + hi) / 2
+        if np.floor(losses / lam).sum() > n:
+            lo = lam
+        else:
+            hi = lam
+    npoints = np.floor(losses / hi).astype(int)
+
+    # The remaining points go to the intervals with the largest loss per
+    # subinterval, which are all just below 'hi', so each of them gets
+    # at most one.
+    remainder = n - npoints.sum()
+    quality = losses / (npoints + 1)
+    npoints[np.lexsort((order, -quality))[:remainder]] += 1
+    return npoints
+
+
+class _LossQueue(collections.abc.MutableMapping):
+    """A dict {interval: loss} that also keeps the intervals sorted by
+    their loss, such that the largest losses are found in O(log N).
+
+    Intervals with equal losses are ordered by their position. Intervals
+    with a loss of nan come after all others.
+    """
+
+    def __init__(self, losses=()):
+        self._losses = dict(losses)
+        self._sorted = sortedcontainers.SortedList(
+            (_LossQueue._key(loss), interval)
+            for interval, loss in self._losses.items())
+
+    @staticmethod
+    def _key(loss):
+        # nan cannot be ordered, so it is sorted as if it were -inf.
+        return math.inf if math.isnan(loss) else -loss
+
+    def __getitem__(self, interval):
+        return self._losses[interval]
+
+    def __setitem__(self, interval, loss):
+        old = self._losses.get(interval)
+        if old is not None:
+            self._sorted.remove((self._key(old), interval))
+        self._losses[interval] = loss
+        self._sorted.add((self._key(loss), interval))
+
+    def __delitem__(self, interval):
+        loss = self._losses.pop(interval)
+        self._sorted.remove((self._key(loss), interval))
+
+    def __iter__(self):
+        return iter(self._losses)
+
+    def __len__(self):
+        return len(self._losses)
+
+    def keys(self):
+        return self._losses.keys()
+
+    def values(self):
+        return self._losses.values()
+
+    def items(self):
+        return self._losses.items()
+
+    def copy(self):
+        other = _LossQueue()
+        other._losses = self._losses.copy()
+        other._sorted = self._sorted.copy()
+        return other
+
+    def max(self):
+        """Return the largest loss."""
+        _, interval = self._sorted[0]
+        return self._losses[interval]
+
+    def largest(self, n):
+        """Return the 'n' intervals with the largest losses, as
+        '(interval, loss)' pairs sorted by decreasing loss."""
+        return [(interval, self._losses[interval])
+                for _, interval in self._sorted.islice(0, n)]
+
+
+class _ArrayData(collections.abc.MutableMapping):
+    """A dict {x: y}, sorted by 'x', that stores all 'y' in a single array.
+
+    The values are returned as (views into) rows of this array.
+    """
+
+    def __init__(self):
+        self.xs = sortedcontainers.SortedList()
+        self._rows = {}  # x -> row of 'self._ys'
+        self._ys = None
+        self._nrows = 0
+        self._free_rows = []
+
+    def __getitem__(self, x):
+        return self._ys[self._rows[x]]
+
+    def __setitem__(self, x, y):
+        row = self._rows.get(x)
+        if row is None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                self._reserve(1, y)
+                row = self._nrows
+                self._nrows += 1
+            self._rows[x] = row
+            self.xs.add(x)
+        self._ys[row] = y
+
+    def __delitem__(self, x):
+        self._free_rows.append(self._rows.pop(x))
+        self.xs.remove(x)
+
+    def __contains__(self, x):
+        return x in self._rows
+
+    def __iter__(self):
+        return iter(self.xs)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def set_many(self, xs, ys):
+        """Set the values 'ys' (an array) of the points 'xs' at once."""
+        rows = np.empty(len(xs), int)
+        new_xs = []
+        self._reserve(len(xs), ys[0])
+        for i, x in enumerate(xs):
+            row = self._rows.get(x)
+            if row is None:
+                row = self._rows[x] = self._nrows
+                self._nrows += 1
+                new_xs.append(x)
+            rows[i] = row
+        self._ys[rows] = ys
+        self.xs.update(new_xs)
+
+    def _reserve(self, n, y):
+        """Make room for 'n' more rows with the shape of 'y'."""
+        if self._ys is None:
+            y = np.asarray(y)
+            dtype = np.result_type(y.dtype, float)
+            self._ys = np.empty((max(16, n),) + y.shape, dtype)
+        elif self._nrows + n > len(self._ys):
+            size = max(2 * len(self._ys), self._nrows + n)
+            ys = np.empty((size,) + self._ys.shape[1:], self._ys.dtype)
+            ys[:self._nrows] = self._ys[:self._nrows]
+            self._ys = ys
+
+    def arrays(self):
+        """Return the sorted 'x' and the corresponding 'y' as arrays."""
+        if not self._rows:
+            return np.array([]), np.array([])
+        rows = np.fromiter((self._rows[x] for x in self.xs), int,
+                           len(self.xs))
+        return np.array(self.xs), self._ys[rows]
+
+
+class _Neighbors(collections.abc.Mapping):
+    """A view {x: [x_lower, x_upper]} of the neighbors of the points in
+    a sorted list, which are found by their position in the list."""
+
+    def __init__(self, xs):
+        self.iloc = xs
+
+    def __getitem__(self, x):
+        xs = self.iloc
+        try:
+            i = xs.index(x)
+        except ValueError:
+            raise KeyError(x) from None
+        return [xs[i - 1] if i > 0 else None,
+                xs[i + 1] if i + 1 < len(xs) else None]
+
+    def __contains__(self, x):
+        return x in self.iloc
+
+    def __iter__(self):
+        return iter(self.iloc)
+
+    def __len__(self):
+        return len(self.iloc)
+
+    def bisect_left(self, x):
+        return self.iloc.bisect_left(x)
+
+    def add(self, x):
+        self.iloc.add(x)
+
+    def discard(self, x):
+        self.iloc.discard(x)
+
+
+class _CombinedData(collections.abc.Mapping):
+    """A read-only view of the real and the interpolated data."""
+
+    def __init__(self, data, data_interp):
+        self.data = data
+        self.data_interp = data_interp
+
+    def __getitem__(self, x):
+        try:
+            return self.data[x]
+        except KeyError:
+            return self.data_interp[x]
+
+    def __iter__(self):
+        return itertools.chain(self.data, self.data_interp)
+
+    def __len__(self):
+        return len(self.data) + len(self.data_interp)
+
+
 class Learner1D(BaseLearner):
     """Learns and predicts a function 'f:ℝ → ℝ^N'.
 
@@ -48,6 +334,18 @@ class Learner1D(BaseLearner):
         A function that returns the loss for a single interval of the domain.
         If not provided, then a default is used, which uses the scaled distance
         in the x-y plane as the loss. See the notes for more details.
+    loss_per_interval_vectorized : callable, optional
+        A function that returns the losses of many intervals at once, used
+        when all losses are recomputed, e.g. when the scale of the data
+        changes. If only 'loss_per_interval_vectorized' is provided, it is
+        also used for single intervals. If only 'loss_per_interval' is
+        provided, the losses are always computed one at a time.
+    cost_aware : bool, default: False
+        If True, intervals are ranked by their loss per predicted second
+        of evaluation, instead of by their loss. The cost of an interval
+        is predicted from the evaluation times of its end points (see
+        'add_cost'), such that fewer points are spent where the function
+        is expensive to evaluate.
 
     Notes
     -----
@@ -62,23 +360,50 @@ class Learner1D(BaseLearner):
     function_values : dict(float -> float)
         A map containing evaluated function values. It is guaranteed
         to have values for both of the points in 'interval'.
-    """
 
-    def __init__(self, function, bounds, loss_per_interval=None):
-        self.function = function
-        self.loss_per_interval = loss_per_interval or _default_loss_per_interval
+    'loss_per_interval_vectorized' takes 5 parameters: x_left, x_right,
+    y_left, y_right and scale, and returns an array with the loss of
+    each interval.
 
-        # A dict storing the loss function for each interval x_n.
-        self.losses = {}
-        self.losses_combined = {}
+    x_left, x_right : numpy array with shape (n,)
+        The bounds of the intervals.
+    y_left, y_right : numpy array with shape (n,) or (n, vdim)
+        The function values at the bounds of the intervals.
+    scale : (float, float)
+        As above.
+    """
 
-        self.data = sortedcontainers.SortedDict()
+    accepts_unchosen_points = True
+
+    def __init__(self, function, bounds, loss_per_interval=None,
+                 loss_per_interval_vectorized=None, cost_aware=False):
+        self.function = function
+        if loss_per_interval is None and loss_per_interval_vectorized is None:
+            loss_per_interval = _default_loss_per_interval
+            loss_per_interval_vectorized = _default_loss_per_interval_vectorized
+        elif loss_per_interval is None:
+            loss_per_interval = functools.partial(_loss_from_vectorized,
+                                                  loss_per_interval_vectorized)
+        self.loss_per_interval = loss_per_interval
+        self.loss_per_interval_vectorized = loss_per_interval_vectorized
+        self.cost_aware = cost_aware
+
+        # The evaluation time (in seconds) of the points, and their sum.
+        self.costs = {}
+        self._total_cost = 0
+
+        # A dict storing the loss function for each interval x_n,
+        # sorted by loss.
+        self.losses = _LossQueue()
+        self.losses_combined = _LossQueue()
+
+        self.data = _ArrayData()
         self.data_interp = {}
 
-        # A dict {x_n: [x_{n-1}, x_{n+1}]} for quick checking of local
-        # properties.
-        self.neighbors = sortedcontainers.SortedDict()
-        self.neighbors_combined = sortedcontainers.SortedDict()
+        # A mapping {x_n: [x_{n-1}, x_{n+1}]} for quick checking of local
+        # properties, derived from the sorted points.
+        self.neighbors = _Neighbors(self.data.xs)
+        self.neighbors_combined = _Neighbors(sortedcontainers.SortedList())
 
         # Bounding box [[minx, maxx], [miny, maxy]].
         self._bbox = [list(bounds), [np.inf, -np.inf]]
@@ -97,7 +422,10 @@ class Learner1D(BaseLearner):
 
     @property
     def data_combined(self):
-        return {**self.data, **self.data_interp}
+        """The real and interpolated data, as a read-only mapping.
+
+        This is a view; it reflects later changes to the learner."""
+        return _CombinedData(self.data, self.data_interp)
 
     @property
     def n(self):
@@ -108,7 +436,25 @@ class Learner1D(BaseLearner):
         if len(losses) == 0:
             return float('inf')
         else:
-            return max(losses.values())
+            return losses.max()
+
+    def add_cost(self, x, seconds):
+        if not self.cost_aware:
+            return
+        seconds = max(seconds, 1e-9)  # such that the ranking is finite
+        self._total_cost += seconds - self.costs.get(x, 0)
+        self.costs[x] = seconds
+
+    def _interval_cost(self, interval):
+        """Predict the cost of a point in 'interval', from its end points,
+        or from all the points if the end points are not evaluated yet."""
+        known = [self.costs[x] for x in interval if x in self.costs]
+        if known:
+            return sum(known) / len(known)
+        elif self.costs:
+            return self._total_cost / len(self.costs)
+        else:
+            return 1
 
     def update_losses(self, x, data, neighbors, losses):
         x_lower, x_upper = neighbors[x]
@@ -131,10 +477,7 @@ class Learner1D(BaseLearner):
 
     def update_neighbors(self, x, neighbors):
         if x not in neighbors:  # The point is new
-            x_lower, x_upper = self.find_neighbors(x, neighbors)
-            neighbors[x] = [x_lower, x_upper]
-            neighbors.get(x_lower, [None, None])[1] = x
-            neighbors.get(x_upper, [None, None])[0] = x
+            neighbors.add(x)
 
     def update_scale(self, x, y):
         """Update the scale with which the x and y-values are scaled.
@@ -150,12 +493,8 @@ class Learner1D(BaseLearner):
         self._scale[0] = self._bbox[0][1] - self._bbox[0][0]
         if y is not None:
             if self.vdim > 1:
-                try:
-                    y_min = np.min([self._bbox[1][0], y], axis=0)
-                    y_max = np.max([self._bbox[1][1], y], axis=0)
-                except ValueError:
-                    # Happens when `_bbox[1]` is a float and `y` a vector.
-                    y_min = y_max = y
+                y_min = np.minimum(self._bbox[1][0], y)
+                y_max = np.maximum(self._bbox[1][1], y)
                 self._bbox[1] = [y_min, y_max]
                 self._scale[1] = np.max(y_max - y_min)
             else:
@@ -166,6 +505,11 @@ class Learner1D(BaseLearner):
     def add_point(self, x, y):
         real = y is not None
 
+        if not real and x in self.data:
+            # The point is known already, e.g. a bound that is
+            # requested again, so there is nothing to interpolate.
+            return
+
         if real:
             # Add point to the real data dict and pop from the unfinished
             # data_interp dict.
@@ -191,8 +535,10 @@ class Learner1D(BaseLearner):
         self.update_scale(x, y)
 
         # Interpolate
-        if not real:
-            self.data_interp = self.interpolate()
+        if real:
+            self._update_interpolation(x)
+        else:
+            self.data_interp[x] = self._interpolate(x)
 
         # Update the losses
         self.update_losses(x, self.data_combined, self.neighbors_combined,
@@ -201,13 +547,130 @@ class Learner1D(BaseLearner):
             self.update_losses(x, self.data, self.neighbors, self.losses)
 
         # If the scale has doubled, recompute all losses.
-        if self._scale > self._oldscale * 2:
-            self.losses = {xs: self.loss_per_interval(xs, self._scale, self.data)
-                           for xs in self.losses}
-            self.losses_combined = {x: self.loss_per_interval(x, self._scale,
-                                                              self.data_combined)
-                                    for x in self.losses_combined}
-            self._oldscale = self._scale
+        if any(new > 2 * old for new, old in zip(self._scale, self._oldscale)):
+            self.losses = self._compute_losses(self.losses, self.data)
+            self.losses_combined = self._compute_losses(self.losses_combined,
+                                                        self.data_combined)
+            self._oldscale = deepcopy(self._scale)
+
+    def add_data(self, xvalues, yvalues):
+        """Add data to the learner.
+
+        Parameters
+        ----------
+        xvalues : value from the function domain, or iterable of such
+            Values from the domain of the learned function.
+        yvalues : value from the function image, or iterable of such
+            Values from the range of the learned function, or None.
+            If 'None', then it indicates that the value has not yet
+            been computed.
+
+        Notes
+        -----
+        Many evaluated points (e.g. arrays of 'x' and 'y') are inserted
+        at once, when there are no unknown points: the points are merged
+        with the data and all the losses are computed in a single pass.
+        """
+        bulk = (not self.data_interp
+                and isinstance(xvalues, collections.abc.Sized)
+                and isinstance(yvalues, collections.abc.Sized)
+                and 1 < len(xvalues) == len(yvalues)
+                and all(y is not None for y in yvalues))
+        if not bulk:
+            return super().add_data(xvalues, yvalues)
+
+        xs = list(xvalues.tolist() if isinstance(xvalues, np.ndarray)
+                  else xvalues)
+        ys = np.asarray(yvalues)
+        if self._vdim is None:
+            self._vdim = ys.shape[1] if ys.ndim > 1 else 1
+        self.data.set_many(xs, ys)
+        self.neighbors_combined = _Neighbors(
+            sortedcontainers.SortedList(self.data.xs))
+
+        # Update the scale
+        self._bbox[0][0] = min(self._bbox[0][0], min(xs))
+        self._bbox[0][1] = max(self._bbox[0][1], max(xs))
+        self._scale[0] = self._bbox[0][1] - self._bbox[0][0]
+        if self.vdim > 1:
+            y_min = np.minimum(self._bbox[1][0], ys.min(axis=0))
+            y_max = np.maximum(self._bbox[1][1], ys.max(axis=0))
+            self._bbox[1] = [y_min, y_max]
+            self._scale[1] = np.max(y_max - y_min)
+        else:
+            self._bbox[1][0] = min(self._bbox[1][0], ys.min(axis=0))
+            self._bbox[1][1] = max(self._bbox[1][1], ys.max(axis=0))
+            self._scale[1] = self._bbox[1][1] - self._bbox[1][0]
+        self._oldscale = deepcopy(self._scale)
+
+        # Update the losses
+        sorted_xs = self.data.xs
+        intervals = list(zip(sorted_xs[:-1], sorted_xs[1:]))
+        if self.loss_per_interval_vectorized is None:
+            self.losses = self._compute_losses(intervals, self.data)
+        else:
+            x, y = self.data.arrays()
+            losses = self.loss_per_interval_vectorized(
+                x[:-1], x[1:], y[:-1], y[1:], self._scale)
+            self.losses = _LossQueue(zip(intervals,
+                                         np.asarray(losses).tolist()))
+        self.losses_combined = self.losses.copy()
+
+    def _compute_losses(self, intervals, data):
+        """Return a '_LossQueue' with the losses of all 'intervals',
+        computed with a single call if the loss is vectorized."""
+        intervals = list(intervals)
+        if self.loss_per_interval_vectorized is None or not intervals:
+            return _LossQueue(
+                (interval, self.loss_per_interval(interval, self._scale, data))
+                for interval in intervals)
+        x_left, x_right = zip(*intervals)
+        y_left = np.array([data[x] for x in x_left])
+        y_right = np.array([data[x] for x in x_right])
+        losses = self.loss_per_interval_vectorized(
+            np.array(x_left), np.array(x_right), y_left, y_right, self._scale)
+        return _LossQueue(zip(intervals, np.asarray(losses).tolist()))
+
+    def _interpolate(self, x):
+        """Interpolate the value at the unknown point 'x' linearly
+        between its real neighbors."""
+        if len(self.data) < 2:
+            return np.zeros(self.vdim) if self.vdim > 1 else 0.0
+        x_lower, x_upper = self.find_neighbors(x, self.neighbors)
+        if x_lower is None or x_upper is None:
+            # Outside of the real data, vectors are zero and
+            # scalars are equal to the nearest value.
+            if self.vdim > 1:
+                return np.zeros(self.vdim)
+            return self.data[x_upper if x_lower is None else x_lower]
+        y_lower, y_upper = self.data[x_lower], self.data[x_upper]
+        if self.vdim > 1:
+            y_lower, y_upper = np.asarray(y_lower), np.asarray(y_upper)
+        t = (x - x_lower) / (x_upper - x_lower)
+        return y_lower + t * (y_upper - y_lower)
+
+    def _update_interpolation(self, x):
+        """Interpolate the unknown points again that are affected by
+        adding the real point 'x'."""
+        if len(self.data) <= 2:
+            # Before, there was not enough data to interpolate,
+            # or 'vdim' was not known.
+            pending = list(self.data_interp)
+        else:
+            # Only the unknown points between the real neighbors of 'x'.
+            pending = []
+            for direction in (0, 1):
+                neighbor = self.neighbors_combined[x][direction]
+                while neighbor is not None and neighbor not in self.data:
+                    pending.append(neighbor)
+                    neighbor = self.neighbors_combined[neighbor][direction]
+
+        data_combined = self.data_combined
+        for p in pending:
+            self.data_interp[p] = self._interpolate(p)
+        for p in pending:
+            self.update_losses(p, data_combined, self.neighbors_combined,
+                               self.losses_combined)
 
     def choose_points(self, n, add_data=True):
         """Return n points that are expected to maximally reduce the loss."""
@@ -235,29 +698,34 @@ class Learner1D(BaseLearner):
             else:
                 points = np.linspace(*self.bounds, n)
         else:
-            def xs(x, n):
-                if n == 1:
-                    return []
-                else:
-                    step = (x[1] - x[0]) / n
-                    return [x[0] + step * i for i in range(1, n)]
+            if self.cost_aware:
+                cost = self._interval_cost
+                candidates = self.losses_combined.items()
+            else:
+                def cost(x_range):
+                    return 1
+                # Only the 'n' intervals with the largest losses can
+                # receive a point, because each point goes to the
+                # interval with the largest loss per point.
+                candidates = self.losses_combined.largest(n)
 
             # Calculate how many points belong to each interval.
-            quals = [(-loss, x_range, 1) for (x_range, loss) in
-                     self.losses_combined.items()]
-
-            heapq.heapify(quals)
-
-            for point_number in range(n):
-                quality, x, n = quals[0]
-                heapq.heapreplace(quals, (quality * n / (n + 1), x, n + 1))
-
-            points = list(itertools.chain.from_iterable(xs(x, n)
-                          for quality, x, n in quals))
-
-            loss_improvements = list(itertools.chain.from_iterable(
-                                     itertools.repeat(-quality, n-1)
-                                     for quality, x, n in quals))
+            candidates = list(candidates)
+            x_left = np.array([x_range[0] for x_range, _ in candidates])
+            x_right = np.array([x_range[1] for x_range, _ in candidates])
+            losses = np.array([loss for _, loss in candidates])
+            costs = np.array([cost(x_range) for x_range, _ in candidates])
+            npoints = _allocate_points(losses / costs, n, x_left)
+
+            # Equally spaced points within each interval.
+            chosen = npoints > 0
+            m = npoints[chosen]
+            step = (x_right[chosen] - x_left[chosen]) / (m + 1)
+            i = np.arange(1, n + 1) - np.repeat(np.cumsum(m) - m, m)
+            points = (np.repeat(x_left[chosen], m)
+                      + np.repeat(step, m) * i).tolist()
+            loss_improvements = np.repeat(losses[chosen] / (m + 1),
+                                          m).tolist()
 
         if add_data:
             self.add_data(points, itertools.repeat(None))
@@ -265,8 +733,7 @@ class Learner1D(BaseLearner):
         return points, loss_improvements
 
     def interpolate(self, extra_points=None):
-        xs = list(self.data.keys())
-        ys = list(self.data.values())
+        xs, ys = self.data.arrays()
         xs_unfinished = list(self.data_interp.keys())
 
         if extra_points is not None:
@@ -282,7 +749,7 @@ class Learner1D(BaseLearner):
                                                 fill_value=0)
                 interp_ys = ip(xs_unfinished).T
             else:
-                ys = np.array(ys).flatten()  # ys could be a list of arrays with shape (1,)
+                ys = ys.flatten()  # ys could be arrays with shape (1,)
                 interp_ys = np.interp(xs_unfinished, xs, ys)
 
         data_interp = {x: y for x, y in zip(xs_unfinished, interp_ys)}
@@ -294,14 +761,25 @@ class Learner1D(BaseLearner):
         if not self.data:
             return hv.Scatter([]) * hv.Path([])
 
+        xs, ys = self.data.arrays()
         if not self.vdim > 1:
-            return hv.Scatter(self.data) * hv.Path([])
+            return hv.Scatter((xs, ys.flatten())) * hv.Path([])
         else:
-            xs = list(self.data.keys())
-            ys = list(self.data.values())
             return hv.Path((xs, ys)) * hv.Scatter([])
 
     def remove_unfinished(self):
+        # Only the intervals next to the unknown points differ between the
+        # real and the combined data, so the time this takes is
+        # proportional to the number of unknown points.
+        pending = list(self.data_interp)
+        for x in pending:
+            x_lower, x_upper = self.neighbors_combined[x]
+            self.losses_combined.pop((x_lower, x), None)
+            self.losses_combined.pop((x, x_upper), None)
+        for x in pending:
+            self.neighbors_combined.discard(x)
+        for x in pending:
+            interval = self.find_neighbors(x, self.neighbors)
+            if interval in self.losses:
+                self.losses_combined[interval] = self.losses[interval]
         self.data_interp = {}
-        self.losses_combined = deepcopy(self.losses)
-        self.neighbors_combined = deepcopy(self.neighbors)
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 from collections import OrderedDict
 from copy import copy
+import functools
+import heapq
 import itertools
-from math import sqrt
+from math import isnan, sqrt
 
 import numpy as np
+import scipy
 from scipy import interpolate
+from scipy.spatial import Delaunay
 
 from .base_learner import BaseLearner
 
@@ -85,6 +89,594 @@ def choose_point_in_triangle(triangle, max_badness):
     return point
 
 
+def _make_delaunay(points, simplices, neighbors):
+    """Return a `scipy.spatial.Delaunay` with the given triangles.
+
+    The object is filled in directly instead of by running Qhull, such
+    that it can be used by `scipy.interpolate.LinearNDInterpolator` and
+    `scipy.spatial.Delaunay.find_simplex` like any other triangulation.
+    The points are lifted to the paraboloid ``z = x**2 + y**2``.
+
+    This relies on the private attributes of `scipy.spatial.Delaunay`,
+    so it is only used if '_can_make_delaunay' is true.
+    """
+    p = points[simplices]
+    lifted = np.concatenate([p, (p**2).sum(axis=-1)[..., None]], axis=-1)
+    normals = np.cross(lifted[:, 1] - lifted[:, 0], lifted[:, 2] - lifted[:, 0])
+    normals /= np.linalg.norm(normals, axis=1)[:, None]
+    normals *= -np.sign(normals[:, -1:])  # the lower facets point down
+    offsets = -(normals * lifted[:, 0]).sum(axis=1)
+
+    tri = Delaunay.__new__(Delaunay)
+    tri.__dict__.update(
+        _points=points, _qhull=None, _transform=None,
+        _vertex_to_simplex=None, _vertex_neighbor_vertices=None,
+        _vertices=simplices, simplices=simplices, neighbors=neighbors,
+        equations=np.hstack([normals, offsets[:, None]]),
+        coplanar=np.zeros((0, 3), dtype=np.intc),
+        good=np.ones(len(simplices), dtype=np.intc),
+        paraboloid_scale=1.0, paraboloid_shift=0.0, furthest_site=False,
+        ndim=2, npoints=len(points), nsimplex=len(simplices),
+        min_bound=points.min(axis=0), max_bound=points.max(axis=0))
+    return tri
+
+
+@functools.lru_cache(maxsize=None)
+def _can_make_delaunay():
+    """Whether '_make_delaunay' works with the installed scipy.
+
+    Only scipy 1.x is supported, and there a small triangulation is
+    checked against the one of Qhull once.
+    """
+    if scipy.__version__.split('.')[0] != '1':
+        return False
+    points = np.array([[0, 0], [1, 0], [0, 1], [1, 1.5], [0.4, 0.3]])
+    xy = np.array([[0.1, 0.1], [0.8, 0.6], [0.3, 0.9], [2, 2]])
+    values = np.arange(len(points), dtype=float)
+    try:
+        control = Delaunay(points)
+        tri = _make_delaunay(points, control.simplices, control.neighbors)
+        return (np.array_equal(tri.find_simplex(xy),
+                               control.find_simplex(xy))
+                and np.allclose(
+                    interpolate.LinearNDInterpolator(tri, values)(xy),
+                    interpolate.LinearNDInterpolator(control, values)(xy),
+                    equal_nan=True))
+    except Exception:
+        return False
+
+
+# The vertices 0, 1, 2 of a '_Triangulation' are infinitely far away, in
+# the directions given by their coordinates. The predicates below are
+# the limits for points that go to infinity in those directions.
+
+def _orientation(xs, ys, a, b, c):
+    """Positive if the vertices 'a', 'b', 'c' are in counterclockwise
+    order, negative if clockwise and zero if they are on a line."""
+    ninfinite = (a < 3) + (b < 3) + (c < 3)
+    if ninfinite == 0:
+        return ((xs[b] - xs[a]) * (ys[c] - ys[a])
+                - (ys[b] - ys[a]) * (xs[c] - xs[a]))
+    elif ninfinite == 1:
+        while c >= 3:
+            a, b, c = b, c, a
+        det = (xs[b] - xs[a]) * ys[c] - (ys[b] - ys[a]) * xs[c]
+        if det == 0:  # 'c' is along the line through 'a' and 'b'
+            det = (ys[b] - ys[a]) * xs[a] - (xs[b] - xs[a]) * ys[a]
+        return det
+    elif ninfinite == 2:
+        while a < 3:
+            a, b, c = b, c, a
+        return xs[b] * ys[c] - ys[b] * xs[c]
+    else:
+        return 1
+
+
+def _in_circle(xs, ys, a, b, c, d):
+    """Whether vertex 'd' is in the circumcircle of the counterclockwise
+    triangle 'a', 'b', 'c'. Points (almost) on the circle are not."""
+    ninfinite = (a < 3) + (b < 3) + (c < 3)
+    if d < 3:
+        if ninfinite != 1:
+            return False
+        while c >= 3:
+            a, b, c = b, c, a
+        return (xs[b] - xs[a]) * ys[d] - (ys[b] - ys[a]) * xs[d] > 0
+    elif ninfinite == 0:
+        adx, ady = xs[a] - xs[d], ys[a] - ys[d]
+        bdx, bdy = xs[b] - xs[d], ys[b] - ys[d]
+        cdx, cdy = xs[c] - xs[d], ys[c] - ys[d]
+        ad = adx * adx + ady * ady
+        bd = bdx * bdx + bdy * bdy
+        cd = cdx * cdx + cdy * cdy
+        det = (ad * (bdx * cdy - bdy * cdx) + bd * (cdx * ady - cdy * adx)
+               + cd * (adx * bdy - ady * bdx))
+        permanent = ((abs(bdx * cdy) + abs(bdy * cdx)) * ad
+                     + (abs(cdx * ady) + abs(cdy * adx)) * bd
+                     + (abs(adx * bdy) + abs(ady * bdx)) * cd)
+        return det > 1e-12 * permanent
+    elif ninfinite == 1:
+        # The circle becomes the half-plane on the left of 'a' -> 'b'.
+        while c >= 3:
+            a, b, c = b, c, a
+        det = _orientation(xs, ys, a, b, d)
+        if det != 0:
+            return det > 0
+        # 'd' is on the line, it is inside if it is between 'a' and 'b'.
+        ab = (xs[b] - xs[a], ys[b] - ys[a])
+        return (0 < (xs[d] - xs[a]) * ab[0] + (ys[d] - ys[a]) * ab[1]
+                < ab[0]**2 + ab[1]**2)
+    elif ninfinite == 2:
+        # The circle becomes the half-plane beyond 'a' in the direction
+        # opposite to the third infinite vertex.
+        while a < 3:
+            a, b, c = b, c, a
+        k = 3 - b - c
+        return (xs[d] - xs[a]) * xs[k] + (ys[d] - ys[a]) * ys[k] < 0
+    else:
+        return True
+
+
+class _Triangulation:
+    """A Delaunay triangulation to which points are added incrementally.
+
+    A point is inserted by splitting the triangle (or the two triangles
+    that share the edge) that contains it, and then flipping the edges
+    that are no longer Delaunay, such that an insertion takes a time
+    proportional to the number of triangles that change. The points are
+    triangulated together with three vertices at infinity, such that
+    every point is inside a triangle; the triangles with those vertices
+    are left out of `delaunay`.
+
+    Parameters
+    ----------
+    scale : callable
+        Returns the coordinates in which the points are triangulated.
+
+    Attributes
+    ----------
+    points : list
+        The points, in the order of the vertices of the triangulation.
+    """
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.points = []
+        self._index = {}
+        # The directions of the vertices at infinity, in counterclockwise
+        # order, followed by the coordinates of the points.
+        self._xs = [0, -sqrt(3) / 2, sqrt(3) / 2]
+        self._ys = [1, -1 / 2, -1 / 2]
+        # The vertices of triangle 't' are '_simplices[3*t:3*t+3]' and
+        # '_neighbors[3*t+i]' is the triangle opposite to its vertex 'i'.
+        self._simplices = [0, 1, 2]
+        self._neighbors = [-1, -1, -1]
+        self._vertex_triangle = [0, 0, 0]
+        # The triangulation as arrays, updated in 'delaunay'.
+        self._coords = np.empty((0, 2))
+        self._simplex_array = np.empty((0, 3), dtype=np.intc)
+        self._neighbor_array = np.empty((0, 3), dtype=np.intc)
+        self._changed = {0}
+        self._delaunay = None
+        # The triangles that changed since '_TriangleLosses.update'.
+        self._updated = {0}
+
+    def copy(self):
+        tri = copy(self)
+        for name in ['points', '_xs', '_ys', '_simplices', '_neighbors',
+                     '_vertex_triangle']:
+            setattr(tri, name, list(getattr(self, name)))
+        tri._index = dict(self._index)
+        tri._changed = set(self._changed)
+        tri._updated = set(self._updated)
+        return tri
+
+    def add(self, point):
+        if point in self._index:
+            return
+        self._index[point] = len(self.points)
+        self.points.append(point)
+        x, y = self.scale(point)
+        v = len(self._xs)
+        self._xs.append(float(x))
+        self._ys.append(float(y))
+        self._vertex_triangle.append(-1)
+        t, i = self._locate(v)
+        if i is None:
+            new = self._split_triangle(t, v)
+        else:
+            new = self._split_edge(t, i, v)
+        self._flip(new)
+        self._delaunay = None
+
+    def delaunay(self):
+        """Return the triangulation as a `scipy.spatial.Delaunay`.
+
+        If '_make_delaunay' does not work with the installed scipy,
+        the points are triangulated again by Qhull.
+        """
+        if self._delaunay is None:
+            self._update_arrays()
+            if not _can_make_delaunay():
+                self._delaunay = Delaunay(self._coords[3:])
+                return self._delaunay
+            simplices = self._simplex_array
+            keep = np.flatnonzero((simplices >= 3).all(axis=1))
+            index = np.full(len(simplices) + 1, -1, dtype=np.intc)
+            index[keep] = np.arange(len(keep))
+            self._delaunay = _make_delaunay(
+                self._coords[3:], simplices[keep] - 3,
+                index[self._neighbor_array[keep]])
+        return self._delaunay
+
+    def _update_arrays(self):
+        nvertices = len(self._xs)
+        if len(self._coords) < nvertices:
+            new = np.column_stack([self._xs[len(self._coords):],
+                                   self._ys[len(self._coords):]])
+            self._coords = np.concatenate([self._coords, new])
+
+        ntriangles = len(self._simplices) // 3
+        if len(self._simplex_array) < ntriangles:
+            extra = ntriangles - len(self._simplex_array)
+            self._simplex_array = np.concatenate(
+                [self._simplex_array, np.empty((extra, 3), dtype=np.intc)])
+            self._neighbor_array = np.concatenate(
+                [self._neighbor_array, np.empty((extra, 3), dtype=np.intc)])
+        changed = list(self._changed)
+        if not changed:
+            return
+        self._simplex_array[changed] = [self._simplices[3*t:3*t+3]
+                                        for t in changed]
+        self._neighbor_array[changed] = [self._neighbors[3*t:3*t+3]
+                                         for t in changed]
+        self._changed = set()
+
+    def _set(self, t, vertices, neighbors):
+        self._simplices[3*t:3*t+3] = vertices
+        self._neighbors[3*t:3*t+3] = neighbors
+        for v in vertices:
+            self._vertex_triangle[v] = t
+        self._changed.add(t)
+        self._updated.add(t)
+
+    def _new_triangle(self):
+        self._simplices += [-1, -1, -1]
+        self._neighbors += [-1, -1, -1]
+        return len(self._simplices) // 3 - 1
+
+    def _replace_neighbor(self, t, old, new):
+        if t != -1:
+            i = self._neighbors.index(old, 3 * t, 3 * t + 3)
+            self._neighbors[i] = new
+            self._changed.add(t)
+
+    def _start(self, v):
+        """Return a triangle near vertex 'v'."""
+        # Take the closest of a few vertices, from which
+        # the walk to 'v' is short on average.
+        xs, ys = self._xs, self._ys
+        x, y = xs[v], ys[v]
+        nearest, best = 0, np.inf
+        step = max(1, int((v - 3)**(2 / 3)))
+        for u in itertools.chain(range(3, v, step), range(max(v - 1, 3), v)):
+            distance = (xs[u] - x)**2 + (ys[u] - y)**2
+            if distance < best:
+                nearest, best = u, distance
+        return self._vertex_triangle[nearest]
+
+    def _find(self, x, y):
+        """Return the vertices of the triangle that contains '(x, y)'.
+
+        A point on the hull is found in the finite triangle next to it.
+        """
+        v = len(self._xs)
+        self._xs.append(x)
+        self._ys.append(y)
+        try:
+            t, i = self._locate(v)
+        finally:
+            del self._xs[v], self._ys[v]
+        if i is not None and self._simplices[3*t + i] < 3:
+            # On the edge between the hull and a vertex at infinity.
+            t = self._neighbors[3*t + i]
+        return self._simplices[3*t:3*t+3]
+
+    def _locate(self, v):
+        """Return the triangle that contains vertex 'v' and the index of
+        the vertex opposite to the edge it is on (or None)."""
+        xs, ys = self._xs, self._ys
+        simplices, neighbors = self._simplices, self._neighbors
+        t = self._start(v)
+        for step in itertools.count():
+            # Walk towards the point, changing the order in which the
+            # edges are tried such that the walk cannot go around in circles.
+            for i in (step % 3, (step + 1) % 3, (step + 2) % 3):
+                a = simplices[3*t + (i + 1) % 3]
+                b = simplices[3*t + (i + 2) % 3]
+                if _orientation(xs, ys, a, b, v) < 0:
+                    t = neighbors[3*t + i]
+                    break
+            else:
+                break
+        on_edge = [i for i in range(3) if _orientation(
+            xs, ys, simplices[3*t + (i + 1) % 3],
+            simplices[3*t + (i + 2) % 3], v) == 0]
+        return t, (on_edge[0] if len(on_edge) == 1 else None)
+
+    def _split_triangle(self, t, v):
+        a, b, c = self._simplices[3*t:3*t+3]
+        na, nb, nc = self._neighbors[3*t:3*t+3]
+        t2, t3 = self._new_triangle(), self._new_triangle()
+        # The new vertex is the first of every new triangle.
+        self._set(t, [v, a, b], [nc, t2, t3])
+        self._set(t2, [v, b, c], [na, t3, t])
+        self._set(t3, [v, c, a], [nb, t, t2])
+        self._replace_neighbor(na, t, t2)
+        self._replace_neighbor(nb, t, t3)
+        return [t, t2, t3]
+
+    def _split_edge(self, t, i, v):
+        simplices, neighbors = self._simplices, self._neighbors
+        a, b, c = [simplices[3*t + (i + k) % 3] for k in range(3)]
+        u, nb, nc = [neighbors[3*t + (i + k) % 3] for k in range(3)]
+        j = neighbors.index(t, 3 * u, 3 * u + 3) - 3 * u
+        d = simplices[3*u + j]
+        nuc = neighbors[3*u + (j + 1) % 3]
+        nub = neighbors[3*u + (j + 2) % 3]
+        t2, u2 = self._new_triangle(), self._new_triangle()
+        self._set(t, [v, a, b], [nc, u2, t2])
+        self._set(t2, [v, c, a], [nb, t, u])
+        self._set(u, [v, d, c], [nub, t2, u2])
+        self._set(u2, [v, b, d], [nuc, u, t])
+        self._replace_neighbor(nb, t, t2)
+        self._replace_neighbor(nuc, u, u2)
+        return [t, t2, u, u2]
+
+    def _flip(self, stack):
+        """Flip the edges opposite to the first vertex of the triangles
+        in 'stack', and those of the triangles made by the flips, until
+        they are Delaunay."""
+        xs, ys = self._xs, self._ys
+        simplices, neighbors = self._simplices, self._neighbors
+        while stack:
+            t = stack.pop()
+            u = neighbors[3*t]
+            if u == -1:
+                continue
+            v, b, c = simplices[3*t:3*t+3]
+            j = neighbors.index(t, 3 * u, 3 * u + 3) - 3 * u
+            d = simplices[3*u + j]
+            if not _in_circle(xs, ys, v, b, c, d):
+                continue
+            if (_orientation(xs, ys, v, b, d) <= 0
+                    or _orientation(xs, ys, v, d, c) <= 0):
+                continue  # the quadrilateral is not convex
+            ntb, ntc = neighbors[3*t + 1], neighbors[3*t + 2]
+            nuc = neighbors[3*u + (j + 1) % 3]
+            nub = neighbors[3*u + (j + 2) % 3]
+            self._set(t, [v, b, d], [nuc, u, ntc])
+            self._set(u, [v, d, c], [nub, ntb, t])
+            self._replace_neighbor(nuc, u, t)
+            self._replace_neighbor(ntb, t, u)
+            stack += [t, u]
+
+
+def _keys(losses):
+    """The keys by which the losses are ordered in a heap: the largest
+    loss first and nan last, because nan cannot be ordered."""
+    losses = np.asarray(losses)
+    return np.where(np.isnan(losses), np.inf, -losses)
+
+
+class _TriangleLosses:
+    """The losses of `_default_loss_per_triangle` of the triangles of a
+    `_Triangulation`, kept up to date as points are added.
+
+    The gradients at the vertices are estimated for all vertices at once,
+    as in `deviations`, but the losses are only computed again for the
+    triangles that changed, or that have a vertex whose value or gradient
+    changed by more than the tolerance of the gradient estimate.
+
+    Parameters
+    ----------
+    tri : `_Triangulation`
+    """
+
+    # The same tolerance as 'deviations'.
+    tol = 1e-6
+
+    def __init__(self, tri):
+        self.tri = tri
+        # Per vertex of 'tri', created with the first value.
+        self._values = self._gradients = None
+        self._known = np.zeros(0, dtype=bool)  # which values are set
+        self._range = None  # the minimum and maximum values, if known
+        self._changed_values = set()
+        # Per triangle, whether it is finite (has a loss) and its loss.
+        self._finite = np.zeros(0, dtype=bool)
+        self._losses = np.zeros(0)
+        # The keys (see '_keys') and the triangles, with possibly outdated
+        # entries that are skipped.
+        self._heap = []
+
+    def copy(self, tri):
+        """Return a copy that belongs to 'tri', a copy of 'self.tri'."""
+        losses = copy(self)
+        losses.tri = tri
+        if self._values is not None:
+            losses._values = self._values.copy()
+            losses._gradients = self._gradients.copy()
+        losses._known = self._known.copy()
+        losses._changed_values = set(self._changed_values)
+        losses._finite = self._finite.copy()
+        losses._losses = self._losses.copy()
+        losses._heap = list(self._heap)
+        return losses
+
+    def set_value(self, point, value):
+        v = self.tri._index[point] + 3
+        value = np.ravel(value).astype(float)
+        if self._values is None:
+            self._values = np.zeros((0, len(value)))
+            self._gradients = np.zeros((0, len(value), 2))
+        elif v < len(self._values) and np.array_equal(self._values[v], value):
+            return
+        if v >= len(self._values):
+            extra = max(v + 1, 2 * len(self._values)) - len(self._values)
+            self._values = np.concatenate(
+                [self._values, np.zeros((extra,) + self._values.shape[1:])])
+            self._gradients = np.concatenate(
+                [self._gradients,
+                 np.zeros((extra,) + self._gradients.shape[1:])])
+            self._known = np.concatenate(
+                [self._known, np.zeros(extra, dtype=bool)])
+
+        if self._range is not None:
+            low, high = self._range
+            old = self._values[v]
+            if self._known[v] and (np.any(old == low) or np.any(old == high)):
+                self._range = None  # found again when needed
+            else:
+                self._range = np.minimum(low, value), np.maximum(high, value)
+        self._values[v] = value
+        self._known[v] = True
+        self._changed_values.add(v)
+
+    def _scale(self):
+        if self._range is None:
+            values = self._values[self._known]
+            self._range = values.min(axis=0), values.max(axis=0)
+        low, high = self._range
+        return (high - low).max() or 1
+
+    def update(self):
+        """Compute the gradients and losses that changed."""
+        tri = self.tri
+        if self._values is None or not (tri._updated or self._changed_values):
+            return
+        n = len(tri._xs)
+        delaunay = tri.delaunay()
+        changed = np.zeros(n, dtype=bool)
+        changed[list(self._changed_values)] = True
+        self._changed_values = set()
+        if len(delaunay.simplices):
+            scale = self._scale()
+            gradients = scale * interpolate.interpnd.estimate_gradients_2d_global(
+                delaunay, self._values[3:n] / scale, tol=self.tol)
+            change = abs(gradients - self._gradients[3:n]).max(axis=(1, 2))
+            size = np.maximum(abs(gradients).max(axis=(1, 2)), scale)
+            changed[3:] |= change > self.tol * size
+            self._gradients[3:n] = gradients
+
+        triangles = set(tri._updated)
+        tri._updated = set()
+        triangles.update(
+            np.flatnonzero(changed[tri._simplex_array].any(axis=1)).tolist())
+        self._update_losses(np.array(sorted(triangles), dtype=int))
+
+    def _update_losses(self, triangles):
+        tri = self.tri
+        ntriangles = len(tri._simplex_array)
+        if len(self._losses) < ntriangles:
+            extra = ntriangles - len(self._losses)
+            self._losses = np.concatenate([self._losses, np.zeros(extra)])
+            self._finite = np.concatenate(
+                [self._finite, np.zeros(extra, dtype=bool)])
+        vertices = tri._simplex_array[triangles]
+        finite = (vertices >= 3).all(axis=1)
+        self._finite[triangles[~finite]] = False
+        triangles, vertices = triangles[finite], vertices[finite]
+
+        p = tri._coords[vertices]
+        v = self._values[vertices]
+        g = self._gradients[vertices]
+        # Like 'deviations' and 'areas', for all levels at once.
+        dev = 0
+        for j in range(3):
+            vest = v[:, j, None] + np.einsum('tkd,tvd->tkv',
+                                             p - p[:, j, None], g[:, j])
+            dev += abs(vest - v).max(axis=1)
+        q = p[:, :-1, :] - p[:, -1, None, :]
+        areas = abs(q[:, 0, 0] * q[:, 1, 1] - q[:, 0, 1] * q[:, 1, 0]) / 2
+        losses = np.sqrt(areas) * dev.sum(axis=1)
+
+        new = (~self._finite[triangles]
+               | (_keys(losses) != _keys(self._losses[triangles])))
+        self._finite[triangles] = True
+        self._losses[triangles] = losses
+        nfinite = np.count_nonzero(self._finite)
+        if len(self._heap) + np.count_nonzero(new) > 2 * nfinite + 100:
+            # Leave out the outdated entries.
+            triangles = np.flatnonzero(self._finite)
+            self._heap = list(zip(_keys(self._losses[triangles]).tolist(),
+                                  triangles.tolist()))
+            heapq.heapify(self._heap)
+        else:
+            for key, t in zip(_keys(losses[new]).tolist(),
+                              triangles[new].tolist()):
+                heapq.heappush(self._heap, (key, t))
+
+    def _is_current(self, key, t):
+        loss = self._losses[t]
+        return self._finite[t] and key == (np.inf if isnan(loss) else -loss)
+
+    def max(self):
+        heap = self._heap
+        while heap and not self._is_current(*heap[0]):
+            heapq.heappop(heap)  # outdated
+        if not heap:
+            raise ValueError('There are no triangles with a loss.')
+        return self._losses[heap[0][1]] / self._scale()
+
+    def largest(self):
+        """Yield the triangles (the coordinates of their vertices) and
+        their losses, from the largest loss to the smallest (with the
+        losses that are nan last)."""
+        heap, losses = self._heap, self._losses
+        coords, simplices = self.tri._coords, self.tri._simplex_array
+        scale = self._scale()
+        done = set()
+        # Walk the heap as a tree, always to the largest loss seen.
+        todo = [(heap[0], 0)] if heap else []
+        while todo:
+            (key, t), i = heapq.heappop(todo)
+            for j in (2 * i + 1, 2 * i + 2):
+                if j < len(heap):
+                    heapq.heappush(todo, (heap[j], j))
+            if self._is_current(key, t) and t not in done:
+                done.add(t)
+                yield coords[simplices[t]], losses[t] / scale
+
+    def arrays(self):
+        """Return the vertices (indices of 'tri.points') of the triangles,
+        their coordinates and their losses."""
+        triangles = np.flatnonzero(self._finite)
+        vertices = self.tri._simplex_array[triangles]
+        coordinates = self.tri._coords[vertices]
+        return vertices - 3, coordinates, self._losses[triangles] / self._scale()
+
+    def interpolate(self, points):
+        """Interpolate the values linearly at 'points' (which are not
+        vertices), or nan outside of the triangulation."""
+        tri = self.tri
+        xs, ys = tri._xs, tri._ys
+        values = np.full((len(points), self._values.shape[1]), np.nan)
+        for i, (x, y) in enumerate(tri.scale(points)):
+            a, b, c = tri._find(float(x), float(y))
+            if min(a, b, c) < 3:
+                continue  # outside the triangulation
+            xs.append(x)
+            ys.append(y)
+            d = len(xs) - 1
+            weights = [_orientation(xs, ys, d, b, c),
+                       _orientation(xs, ys, a, d, c),
+                       _orientation(xs, ys, a, b, d)]
+            del xs[d], ys[d]
+            values[i] = np.dot(weights, self._values[[a, b, c]]) / sum(weights)
+        return values
+
+
 class Learner2D(BaseLearner):
     """Learns and predicts a function 'f: ℝ^2 → ℝ^N'.
 
@@ -102,6 +694,11 @@ class Learner2D(BaseLearner):
         the deviation from a linear estimate, as well as
         triangle area, to determine the loss. See the notes
         for more details.
+    cost_aware : bool, default: False
+        If True, triangles are ranked by their loss per predicted second
+        of evaluation, instead of by their loss. The cost of a triangle
+        is predicted from the evaluation times of its vertices (see
+        'add_cost').
 
 
     Attributes
@@ -146,14 +743,20 @@ class Learner2D(BaseLearner):
     over each triangle.
     """
 
-    def __init__(self, function, bounds, loss_per_triangle=None):
+    accepts_unchosen_points = True
+
+    def __init__(self, function, bounds, loss_per_triangle=None,
+                 cost_aware=False):
         self.ndim = len(bounds)
         self._vdim = None
         self.loss_per_triangle = loss_per_triangle or _default_loss_per_triangle
+        self.cost_aware = cost_aware
+        self.costs = {}
+        self._total_cost = 0
         self.bounds = tuple((float(a), float(b)) for a, b in bounds)
         self.data = OrderedDict()
         self._stack = OrderedDict()
-        self._interp = set()
+        self._interp = OrderedDict()  # the unknown points, in order
 
         xy_mean = np.mean(self.bounds, axis=1)
         xy_scale = np.ptp(self.bounds, axis=1)
@@ -174,6 +777,13 @@ class Learner2D(BaseLearner):
         self.function = function
         self._ip = self._ip_combined = None
 
+        # The triangulations of the real points and of all points,
+        # including the unknown ones, and the default losses of
+        # their triangles.
+        self._tri = _Triangulation(self.scale)
+        self._losses = _TriangleLosses(self._tri)
+        self._tri_combined = self._losses_combined = None
+
         self.stack_size = 10
 
     @property
@@ -214,50 +824,126 @@ class Learner2D(BaseLearner):
 
     def ip(self):
         if self._ip is None:
-            points = self.scale(list(self.data.keys()))
-            values = list(self.data.values())
-            self._ip = interpolate.LinearNDInterpolator(points, values)
+            values = [self.data[p] for p in self._tri.points]
+            self._ip = interpolate.LinearNDInterpolator(self._tri.delaunay(),
+                                                        values)
         return self._ip
 
+    def _make_tri_combined(self):
+        if self._tri_combined is None:
+            self._tri_combined = self._tri.copy()
+            self._losses_combined = self._losses.copy(self._tri_combined)
+            for point in self._interp:
+                self._tri_combined.add(point)
+
     def ip_combined(self):
         if self._ip_combined is None:
+            self._make_tri_combined()
             data_combined = self.data_combined()
-            points = self.scale(list(data_combined.keys()))
-            values = list(data_combined.values())
-            self._ip_combined = interpolate.LinearNDInterpolator(points,
-                                                                 values)
+            values = [data_combined[p] for p in self._tri_combined.points]
+            self._ip_combined = interpolate.LinearNDInterpolator(
+                self._tri_combined.delaunay(), values)
         return self._ip_combined
 
+    def add_cost(self, point, seconds):
+        if not self.cost_aware:
+            return
+        point = tuple(point)
+        seconds = max(seconds, 1e-9)  # such that the ranking is finite
+        self._total_cost += seconds - self.costs.get(point, 0)
+        self.costs[point] = seconds
+
+    def _triangle_costs(self, simplices):
+        """Predict the cost of a point in each triangle (the indices of
+        its vertices in '_tri_combined'), from the evaluated vertices
+        (or from all points if there are none)."""
+        mean_cost = self._total_cost / len(self.costs) if self.costs else 1
+        costs = np.array([self.costs.get(p, np.nan)
+                          for p in self._tri_combined.points])
+        costs = costs[simplices]
+        known = ~np.isnan(costs)
+        nknown = known.sum(axis=1)
+        total = np.where(known, costs, 0).sum(axis=1)
+        return np.where(nknown > 0, total / np.maximum(nknown, 1), mean_cost)
+
     def add_point(self, point, value):
         point = tuple(point)
 
         if value is None:
-            self._interp.add(point)
+            self._interp[point] = None
             self._ip_combined = None
         else:
             self.data[point] = value
-            self._interp.discard(point)
+            self._interp.pop(point, None)
+            self._tri.add(point)
+            self._losses.set_value(point, value)
             self._ip = None
 
+        if self._tri_combined is not None:
+            self._tri_combined.add(point)
+            if value is not None:
+                self._losses_combined.set_value(point, value)
         self._stack.pop(point, None)
 
+    def _remove_from_interp(self, points):
+        for point in points:
+            self._interp.pop(point, None)
+        # Points cannot be removed from '_tri_combined',
+        # so it is made again when it is needed.
+        self._tri_combined = self._losses_combined = None
+
+    def _default_losses(self, real=True):
+        """Return the up to date '_TriangleLosses' of the real points,
+        or of all points."""
+        if real:
+            self._losses.update()
+            return self._losses
+        self._make_tri_combined()
+        if self._interp:
+            points = list(self._interp)
+            if self.bounds_are_done:
+                values = self._losses.interpolate(points)
+            else:
+                # As in 'data_combined'.
+                values = np.zeros((len(points), self.vdim))
+            for point, value in zip(points, values):
+                self._losses_combined.set_value(point, value)
+        self._losses_combined.update()
+        return self._losses_combined
+
+    def _ranked_triangles(self):
+        """Yield the triangles of all points (the scaled coordinates of
+        their vertices) and their losses, from the highest ranked."""
+        if self.loss_per_triangle is _default_loss_per_triangle:
+            losses = self._default_losses(real=False)
+            if not self.cost_aware:
+                yield from losses.largest()
+                return
+            simplices, triangles, losses = losses.arrays()
+        else:
+            ip = self.ip_combined()
+            losses = self.loss_per_triangle(ip)
+            simplices = ip.tri.simplices
+            triangles = ip.tri.points[simplices]
+
+        if self.cost_aware:
+            ranking = losses / self._triangle_costs(simplices)
+        else:
+            ranking = np.array(losses, dtype=float)
+        for _ in range(len(losses)):
+            jsimplex = np.argmax(ranking)
+            yield triangles[jsimplex], losses[jsimplex]
+            ranking[jsimplex] = -np.inf
+
     def _fill_stack(self, stack_till=1):
         if len(self.data) + len(self._interp) < self.ndim + 1:
             raise ValueError("too few points...")
 
-        # Interpolate
-        ip = self.ip_combined()
-
-        losses = self.loss_per_triangle(ip)
-
         points_new = []
         losses_new = []
-        for j, _ in enumerate(losses):
-            jsimplex = np.argmax(losses)
-            triangle = ip.tri.points[ip.tri.vertices[jsimplex]]
+        for triangle, loss_new in self._ranked_triangles():
             point_new = choose_point_in_triangle(triangle, max_badness=5)
             point_new = tuple(self.unscale(point_new))
-            loss_new = losses[jsimplex]
 
             points_new.append(point_new)
             losses_new.append(loss_new)
@@ -266,9 +952,9 @@ class Learner2D(BaseLearner):
 
             if len(self._stack) >= stack_till:
                 break
-            else:
-                losses[jsimplex] = -np.inf
 
+        if not points_new:
+            raise ValueError('There are no triangles to choose points in.')
         return points_new, losses_new
 
 
@@ -295,20 +981,22 @@ class Learner2D(BaseLearner):
         if not add_data:
             self._stack = OrderedDict(zip(points[:self.stack_size],
                                           loss_improvements))
-            for point in points[:n]:
-                self._interp.discard(point)
+            self._remove_from_interp(points[:n])
 
         return points[:n], loss_improvements[:n]
 
     def loss(self, real=True):
         if not self.bounds_are_done:
             return np.inf
+        if self.loss_per_triangle is _default_loss_per_triangle:
+            return self._default_losses(real).max()
         ip = self.ip() if real else self.ip_combined()
         losses = self.loss_per_triangle(ip)
         return losses.max()
 
     def remove_unfinished(self):
-        self._interp = set()
+        self._remove_from_interp(list(self._interp))
+        self._ip_combined = None
 
     def plot(self, n=None, tri_alpha=0):
         import holoviews as hv
@@ -83,10 +83,23 @@ def live_plot(runner, *, plotter=None, update_interval=2, name=None):
         raise RuntimeError('Plotting requires the holoviews Python package'
                            ' which is not installed.')
 
+    if not plotter:
+        def plotter(learner):
+            return learner.plot()
+
+    # While a runner with a learner thread is running, the learner is only
+    # accessed from that thread, so the plots are made there, and the
+    # most recent one is shown.
+    in_learner_thread = runner._learner_executor is not None
+    plots = []
+    if in_learner_thread and not runner.task.done():
+        plots.append(runner._learner_executor.submit(
+            plotter, runner.learner).result())
+
     def plot_generator():
         while True:
-            if not plotter:
-                yield runner.learner.plot()
+            if in_learner_thread and not runner.task.done():
+                yield plots[-1]
             else:
                 yield plotter(runner.learner)
 
@@ -97,10 +110,15 @@ def live_plot(runner, *, plotter=None, update_interval=2, name=None):
     # Could have used dm.periodic in the following, but this would either spin
     # off a thread (and learner is not threadsafe) or block the kernel.
 
+    async def update():
+        if in_learner_thread:
+            plots[:] = [await runner._call_learner(plotter, runner.learner)]
+        dm.event()
+
     async def updater():
         try:
             while not runner.task.done():
-                dm.event()
+                await update()
                 await asyncio.sleep(update_interval)
             dm.event()  # fire off one last update before we die
         finally:
@@ -1,6 +1,19 @@
 # -*- coding: utf-8 -*-
 import asyncio
+from collections import OrderedDict
 import concurrent.futures as concurrent
+import itertools
+import math
+import mmap
+import os
+import pickle
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from .learner import BaseLearner
 
 try:
     import ipyparallel
@@ -23,12 +36,17 @@ class Runner:
     learner : Learner
     executor : concurrent.futures.Executor, or ipyparallel.Client, optional
         The executor in which to evaluate the function to be learned.
-        If not provided, a new ProcessPoolExecutor is used.
+        If not provided, a new ProcessPoolExecutor is used. The number of
+        workers is polled during the run, such that the runner follows
+        clusters that are scaled up or down. While there are no workers,
+        the runner waits for them to join.
     goal : callable, optional
         The end condition for the calculation. This function must take the
         learner as its sole argument, and return True if we should stop.
-    log : bool, default: False
-        If True, record the method calls made to the learner by this runner
+    log : bool or str, default: False
+        If True, record the method calls made to the learner by this runner.
+        If a filename, stream the record to this file instead of keeping it
+        in memory, which is preferable for long runs. See 'LogFile'.
     ioloop : asyncio.AbstractEventLoop, optional
         The ioloop in which to run the learning algorithm. If not provided,
         the default event loop is used.
@@ -36,6 +54,81 @@ class Runner:
         If True, shutdown the executor when the runner has completed. If
         'executor' is not provided then the executor created internally
         by the runner is shut down, regardless of this parameter.
+    chunksize : int or 'auto', default: 1
+        The number of points that are evaluated in a single task on the
+        executor. Sending several points per task amortizes the overhead
+        of submitting a task (pickling, IPC, scheduling), which dominates
+        when evaluating the function is cheap. If 'auto', the chunk size
+        is adapted during the run such that a task takes roughly
+        0.1 seconds.
+    vectorized : bool, default: False
+        If True, the learner's function is called once per chunk with a
+        numpy array of points, and must return a sequence of values, one
+        per point.
+    tasks_per_core : int, default: 1
+        The number of tasks that are kept outstanding per core of the
+        executor. Values larger than 1 ensure that the workers always have
+        queued work while the learner chooses new points, or while the
+        results make the round-trip through a (remote) scheduler.
+    learner_thread : bool, default: False
+        If True, all calls to the learner (including the goal) are made
+        from a dedicated thread, such that the ioloop stays responsive
+        (e.g. for 'live_plot' or a Jupyter kernel) while the learner
+        performs expensive bookkeeping. The learner is only ever
+        accessed from this single thread.
+    save_path : str, optional
+        If provided, the points that are added to the learner are appended
+        to this file, such that the run can be continued with
+        'Runner.resume' after a crash.
+    save_every : float, optional
+        The interval (in seconds) between the snapshots written to
+        'save_path'. Every snapshot only contains the points added since
+        the previous one and is written from a separate thread. If not
+        provided, the points are only saved when the runner stops.
+    goal_interval : float, optional
+        If provided, the goal is only evaluated when at least this many
+        seconds passed since it was last evaluated. Useful when evaluating
+        the goal is expensive, e.g. 'learner.loss()' of a large learner.
+    goal_npoints : int, optional
+        If provided, the goal is only evaluated when at least this many
+        points were added since it was last evaluated. If both
+        'goal_interval' and 'goal_npoints' are provided, the goal is
+        evaluated when either of them is due.
+    cache : adaptive.cache.EvaluationCache, optional
+        Values of points that are in the cache are added to the learner
+        without evaluating the function; all new values are stored in it.
+    shared_memory : bool, default: False
+        If True, workers on the same machine write array-valued results
+        into shared memory, instead of sending them back through the
+        executor. This saves pickling and sending large (e.g. 'vdim > 1')
+        values. The values are copied out of the shared memory when they
+        are received, and the memory is reused for later results.
+        The shape and dtype are taken from the first result; values that
+        do not match are sent back as usual.
+    timeout : float, optional
+        The maximal time (in seconds) that evaluating a point may take,
+        from when its task starts on a worker. The tasks are assumed to
+        start in the order they are submitted, as soon as a worker is
+        free. A task with several points (see 'chunksize') may take
+        proportionally longer. A task that takes too long is cancelled
+        and counts as failed. Note that cancelling does not stop a
+        function that is already running, e.g. in a process pool: a point
+        that hangs keeps its worker busy until the executor is shut down,
+        or until the function returns, after which the worker is counted
+        as free again.
+    retries : int, default: 0
+        The number of times a task is resubmitted when it fails, either
+        because the function raised an exception or because it timed out.
+    raise_if_retries_exceeded : bool, default: True
+        If True, the runner stops and raises the exception of a task that
+        failed more than 'retries' times. If False, the points of the task
+        are recorded in 'failed' and the runner continues. These points
+        remain pending in the learner until the runner stops.
+    speculate : float, optional
+        If provided, a task that has been running longer than 'speculate'
+        times the 95th percentile of the observed latencies is submitted
+        a second time; the copy that finishes first is used. This
+        mitigates stragglers, e.g. slow nodes in a cluster.
 
     Attributes
     ----------
@@ -43,13 +136,36 @@ class Runner:
         The underlying task. May be cancelled to stop the runner.
     learner : Learner
         The underlying learner. May be queried for its state
-    log : list or None
+    log : list, LogFile or None
         Record of the method calls made to the learner, in the format
-        '(method_name, *args)'.
+        '(method_name, *args)'. 'add_cost' is only called, and recorded,
+        if the learner is cost-aware.
+    chunksize : int
+        The number of points that are currently sent per task.
+    stats : RunnerStats
+        Timings of the learner, the evaluations and the executor.
+    failed : dict
+        The points that failed more than 'retries' times, and the last
+        exception they raised.
     """
 
     def __init__(self, learner, executor=None, goal=None, *,
-                 log=False, ioloop=None, shutdown_executor=True):
+                 log=False, ioloop=None, shutdown_executor=True,
+                 chunksize=1, vectorized=False, tasks_per_core=1,
+                 learner_thread=False, save_path=None, save_every=None,
+                 goal_interval=None, goal_npoints=None, cache=None,
+                 shared_memory=False, timeout=None, retries=0,
+                 raise_if_retries_exceeded=True, speculate=None):
+        self._auto_chunksize = (chunksize == 'auto')
+        self.chunksize = 1 if self._auto_chunksize else int(chunksize)
+        if self.chunksize < 1:
+            raise ValueError("'chunksize' must be a positive integer "
+                             "or 'auto'.")
+        self.vectorized = vectorized
+        if tasks_per_core < 1:
+            raise ValueError("'tasks_per_core' must be at least 1.")
+        self.tasks_per_core = tasks_per_core
+
         self.ioloop = ioloop if ioloop else asyncio.get_event_loop()
 
         if in_ipynb() and not self.ioloop.is_running():
@@ -61,82 +177,960 @@ class Runner:
         self.shutdown_executor = shutdown_executor or (executor is None)
         self.executor = ensure_async_executor(executor, self.ioloop)
         self.learner = learner
-        self.log = [] if log else None
+        if isinstance(log, str):
+            self.log = LogFile(log)
+        else:
+            self.log = [] if log else None
+        self.cache = cache
+
+        # The function is only sent along with a task when a worker
+        # does not have it yet, see '_evaluate_registered'. Processes
+        # forked from this one inherit the registry.
+        self._function_key = uuid.uuid4().hex
+        _register(self._function_key, learner.function, pin=True)
+
+        self.shared_memory = shared_memory
+        self._arena = None
+
+        self.timeout = timeout
+        self.retries = retries
+        self.raise_if_retries_exceeded = raise_if_retries_exceeded
+        self.speculate = speculate
+        self.failed = {}
+
+        if learner_thread:
+            self._learner_executor = concurrent.ThreadPoolExecutor(1)
+        else:
+            self._learner_executor = None
 
         if goal is None:
             def goal(_):
                 return False
 
         self.goal = goal
+        self.goal_interval = goal_interval
+        self.goal_npoints = goal_npoints
+        self._last_goal = None
+        self._npoints_since_goal = 0
+        self.stats = RunnerStats()
+
+        self.save_path = save_path
+        self.save_every = save_every
+        self._unsaved = [], []
+        self._last_save = time.perf_counter()
+        self._saving = None
 
         coro = self._run()
         self.task = self.ioloop.create_task(coro)
 
+    @classmethod
+    def resume(cls, save_path, learner, *args, **kwargs):
+        """Add the points saved in 'save_path' to 'learner' and continue
+        learning, appending new points to the same file.
+
+        The remaining arguments are passed to the 'Runner'.
+        """
+        xs, ys = [], []
+        for chunk_xs, chunk_ys in _read_records(save_path):
+            xs.extend(chunk_xs)
+            ys.extend(chunk_ys)
+        learner.add_data(xs, ys)
+        return cls(learner, *args, save_path=save_path, **kwargs)
+
     def run_sync(self):
         return self.ioloop.run_until_complete(self.task)
 
+    def _submit(self, points, with_function=False):
+        function = self.learner.function if with_function else None
+        if self._arena is None:
+            out = None
+        else:
+            out = self._arena.allocate(len(points))
+        fut = self.executor.submit(_evaluate_registered, self._function_key,
+                                   points, self.vectorized, function, out)
+        return fut, time.perf_counter(), out
+
+    def _track_timed_out(self, fut, finished):
+        """Call 'finished' in the ioloop once the worker stops evaluating
+        the timed out task 'fut', which may be right away."""
+        def done(_):
+            try:
+                self.ioloop.call_soon_threadsafe(finished)
+            except RuntimeError:
+                pass  # the ioloop is closed, the runner is done
+
+        if fut.cancel():  # it did not start yet
+            finished()
+        else:
+            fut.add_done_callback(done)
+
+    def _receive(self, values, out):
+        """Replace the values that were written to shared memory by
+        copies, and release their slots."""
+        if out is not None:
+            values = [self._arena.read(slot)
+                      if isinstance(y, _InSharedMemory) else y
+                      for y, slot in zip(values, out.slots)]
+            self._arena.release(out)
+        elif self.shared_memory and self._arena is None:
+            for y in values:
+                if isinstance(y, np.ndarray) and y.dtype.kind in 'biufc':
+                    self._arena = _SharedArena(y.shape, y.dtype)
+                    break
+        return values
+
+    def _is_straggler(self, npoints, age):
+        stats = self.stats
+        if stats.queueing.count < _min_latency_samples:
+            return False
+        latency = (stats.evaluation.quantile(0.95) * npoints
+                   + stats.queueing.quantile(0.95))
+        return age > self.speculate * latency
+
+    def _tune_chunksize(self, n, duration):
+        # Scale the chunk size such that a task takes roughly
+        # '_target_task_duration', without growing too fast.
+        per_point = duration / n
+        target = max(1, int(_target_task_duration / max(per_point, 1e-9)))
+        self.chunksize = min(target, 2 * self.chunksize)
+
+    async def _call_learner(self, method, *args):
+        """Call 'method' in the learner thread, if there is one."""
+        if self._learner_executor is None:
+            return method(*args)
+        return await self.ioloop.run_in_executor(self._learner_executor,
+                                                 method, *args)
+
+    def _goal_is_due(self):
+        interval, npoints = self.goal_interval, self.goal_npoints
+        if self._last_goal is None or (interval is None and npoints is None):
+            return True
+        return ((interval is not None
+                 and time.perf_counter() - self._last_goal >= interval)
+                or (npoints is not None
+                    and self._npoints_since_goal >= npoints))
+
+    def _goal(self):
+        if not self._goal_is_due():
+            return False
+        t_start = time.perf_counter()
+        done = self.goal(self.learner)
+        t_stop = time.perf_counter()
+        self.stats.goal.add(t_stop - t_start)
+        self._last_goal = t_stop
+        self._npoints_since_goal = 0
+        return done
+
+    def _choose_points(self, n):
+        if self.log is not None:
+            self.log.append(('choose_points', n))
+        t_start = time.perf_counter()
+        points, _ = self.learner.choose_points(n)
+        self.stats.choose_points.add(time.perf_counter() - t_start)
+        return points
+
+    def _add_points(self, points, values, costs=None):
+        t_start = time.perf_counter()
+        # The evaluation times are known before the values, such that
+        # cost-aware learners can use them when updating their losses.
+        if not getattr(self.learner, 'cost_aware', False):
+            costs = None
+        for x, seconds in zip(points, costs or ()):
+            if self.log is not None:
+                self.log.append(('add_cost', x, seconds))
+            self.learner.add_cost(x, seconds)
+        for x, y in zip(points, values):
+            if self.log is not None:
+                self.log.append(('add_point', x, y))
+            self.learner.add_point(x, y)
+        self._npoints_since_goal += len(points)
+        if points:
+            duration = time.perf_counter() - t_start
+            self.stats.add_point.add(duration / len(points), len(points))
+        if self.save_path is not None:
+            self._unsaved[0].extend(points)
+            self._unsaved[1].extend(values)
+
+    def _save(self):
+        """Append the points added since the last snapshot to 'save_path',
+        from a thread."""
+        if self._saving is not None:
+            if not self._saving.done():
+                return  # try again when the previous snapshot is written
+            self._saving.result()  # raise errors from the previous snapshot
+        records, self._unsaved = self._unsaved, ([], [])
+        self._last_save = time.perf_counter()
+        self._saving = self.ioloop.run_in_executor(
+            None, _append_records, self.save_path, records)
+
     async def _run(self):
-        first_completed = asyncio.FIRST_COMPLETED
         xs = dict()
-        done = [None] * self.executor.ncores
-        do_log = self.log is not None
+        # Futures put themselves in this queue when they complete, such that
+        # collecting a result does not depend on the number of tasks in flight.
+        completed = asyncio.Queue()
+        stats = self.stats
+
+        # The tasks in flight that are running on a worker, and since
+        # when. The timeouts are measured from then.
+        started = {}
+        # The 'concurrent.futures.Future' of each task in flight.
+        underlying = {}
+        # The tasks that timed out, and that still keep a worker busy.
+        ntimed_out = 0
+
+        def mark_started(ncores):
+            # The executor starts the tasks in the order they were
+            # submitted, so the first tasks in flight are running, one on
+            # each worker that is not busy with a task that timed out.
+            now = time.perf_counter()
+            for fut in itertools.islice(xs, max(ncores - ntimed_out, 0)):
+                started.setdefault(fut, now)
 
-        if len(done) == 0:
-            raise RuntimeError('Executor has no workers')
+        def submit(task, with_function=False):
+            cfut, t_submit, out = self._submit(task.points, with_function)
+            fut = asyncio.wrap_future(cfut, loop=self.ioloop)
+            underlying[fut] = cfut
+            fut.add_done_callback(completed.put_nowait)
+            xs[fut] = task, t_submit, out
+            task.futures.add(fut)
 
+        def cancel(fut):
+            task, *_ = xs.pop(fut)
+            started.pop(fut, None)
+            underlying.pop(fut, None)
+            task.futures.discard(fut)
+            fut.cancel()
+
+        def worker_freed():
+            nonlocal ntimed_out
+            ntimed_out -= 1
+
+        def fail(task, exc):
+            if task.attempts < self.retries:
+                task.attempts += 1
+                submit(task)
+            elif self.raise_if_retries_exceeded:
+                raise exc
+            else:
+                for x in task.points:
+                    self.failed[x] = exc
+
+        def check_stragglers():
+            nonlocal ntimed_out
+            now = time.perf_counter()
+            for fut, (task, t_submit, _) in list(xs.items()):
+                age, npoints = now - t_submit, len(task.points)
+                running = now - started.get(fut, now)
+                if (self.timeout is not None
+                    and running > self.timeout * npoints):
+                    ntimed_out += 1
+                    self._track_timed_out(underlying[fut], worker_freed)
+                    cancel(fut)
+                    if not task.futures:
+                        fail(task, TimeoutError(
+                            'Evaluating {} took longer than {} seconds.'
+                            .format(task.points, self.timeout * npoints)))
+                elif (self.speculate is not None and len(task.futures) == 1
+                      and self._is_straggler(npoints, age)):
+                    submit(task)
+
+        if self.timeout is not None:
+            check_interval = min(self.timeout / 4, 1)
+        elif self.speculate is not None:
+            check_interval = 1
+        else:
+            check_interval = None
+        last_check = time.perf_counter()
+        getter = None
+
+        stats.start()
         try:
-            while not self.goal(self.learner):
+            while not await self._call_learner(self._goal):
+                # The number of workers may change during the run,
+                # e.g. when a dask cluster is scaled.
+                ncores = self.executor.ncores
+                stats.set_ncores(ncores)
+                if ncores == 0 and not xs:
+                    # Wait for workers to join.
+                    await asyncio.sleep(self.executor.ncores_interval)
+                    continue
+
                 # Launch tasks to replace the ones that completed
-                # on the last iteration.
-                if do_log:
-                    self.log.append(('choose_points', len(done)))
-
-                points, _ = self.learner.choose_points(len(done))
-                for x in points:
-                    xs[self.executor.submit(self.learner.function, x)] = x
-
-                # Collect and results and add them to the learner
-                futures = list(xs.keys())
-                done, _ = await asyncio.wait(futures,
-                                             return_when=first_completed,
-                                             loop=self.ioloop)
+                # on the last iteration, keeping 'ntasks' in flight.
+                ntasks = ncores * self.tasks_per_core
+                chunksize = self.chunksize
+                n = (ntasks - len(xs)) * chunksize
+                if n > 0:
+                    points = await self._call_learner(self._choose_points, n)
+                    if self.cache is not None:
+                        cached = self.cache.get_many(points)
+                        if cached:
+                            points = [x for x in points if x not in cached]
+                            await self._call_learner(self._add_points,
+                                                     list(cached),
+                                                     list(cached.values()))
+                    for i in range(0, len(points), chunksize):
+                        submit(_Task(points[i:i + chunksize]))
+                mark_started(ncores)
+
+                if not xs:
+                    continue  # all the points were in the cache
+
+                # Wait for a task to complete, and also collect all
+                # the other tasks that completed in the mean time.
+                if check_interval is None:
+                    done = [await completed.get()]
+                else:
+                    # Wake up regularly to check for stragglers. The getter
+                    # is kept across iterations, such that a completed
+                    # future is never lost by cancelling it.
+                    if getter is None:
+                        getter = asyncio.ensure_future(completed.get(),
+                                                       loop=self.ioloop)
+                    await asyncio.wait([getter], timeout=check_interval)
+                    done = []
+                    if getter.done():
+                        done.append(getter.result())
+                        getter = None
+                while not completed.empty():
+                    done.append(completed.get_nowait())
+
+                # Collect the results and add them to the learner
+                points, values, costs = [], [], []
                 for fut in done:
-                    x = xs.pop(fut)
-                    y = await fut
-                    if do_log:
-                        self.log.append(('add_point', x, y))
-                    self.learner.add_point(x, y)
+                    if fut not in xs:
+                        continue  # a cancelled copy of a task
+                    task, t_submit, out = xs.pop(fut)
+                    started.pop(fut, None)
+                    underlying.pop(fut, None)
+                    task.futures.discard(fut)
+                    try:
+                        ys, duration = fut.result()
+                    except Exception as e:
+                        if out is not None:
+                            self._arena.release(out)  # the worker is done with it
+                        if isinstance(e, _MissingFunction):
+                            # The worker does not have the function yet.
+                            submit(task, with_function=True)
+                        elif not task.futures:  # no other copy is running
+                            fail(task, e)
+                        continue
+                    for other in list(task.futures):
+                        cancel(other)
+                    ys = self._receive(ys, out)
+                    round_trip = time.perf_counter() - t_submit
+                    chunk = task.points
+                    stats.evaluation.add(duration / len(chunk), len(chunk))
+                    stats.queueing.add(max(round_trip - duration, 0))
+                    if self._auto_chunksize:
+                        self._tune_chunksize(len(chunk), round_trip)
+                    points.extend(chunk)
+                    values.extend(ys)
+                    costs.extend([duration / len(chunk)] * len(chunk))
+                if self.cache is not None and points:
+                    self.cache.set_many(points, values)
+                if points:
+                    await self._call_learner(self._add_points, points, values,
+                                             costs)
+
+                now = time.perf_counter()
+                if (check_interval is not None
+                    and now - last_check > check_interval):
+                    check_stragglers()
+                    last_check = now
+
+                if (self.save_every is not None and self.save_path is not None
+                    and now - self._last_save > self.save_every):
+                    self._save()
         finally:
             # remove points with 'None' values from the learner
-            self.learner.remove_unfinished()
+            await self._call_learner(self.learner.remove_unfinished)
+            if self.save_path is not None:
+                if self._saving is not None:
+                    await self._saving
+                self._save()
+                await self._saving
             # cancel any outstanding tasks
+            if getter is not None:
+                getter.cancel()
             remaining = list(xs.keys())
             if remaining:
                 for fut in remaining:
                     fut.cancel()
                 await asyncio.wait(remaining)
+            if self._learner_executor is not None:
+                self._learner_executor.shutdown()
+            if self.shutdown_executor:
+                self.executor.shutdown()
+            if isinstance(self.log, LogFile):
+                self.log.flush()
+            _unregister(self._function_key)
+            if self._arena is not None:
+                self._arena.unlink()
+            stats.stop()
+
+
+class Scheduler:
+    """Runs several learners, each with its own goal, in a single executor.
+
+    The worker slots of the executor are divided between the learners
+    that did not reach their goal yet; a learner that is done frees its
+    slots for the others straight away.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, or ipyparallel.Client, optional
+        The executor in which to evaluate the functions to be learned.
+        If not provided, a new ProcessPoolExecutor is used.
+    ioloop : asyncio.AbstractEventLoop, optional
+        The ioloop in which to run the learning algorithms. If not
+        provided, the default event loop is used.
+    shutdown_executor : Bool, default: True
+        If True, shutdown the executor in 'run_sync' when all learners
+        are done. If 'executor' is not provided then the executor
+        created internally is shut down, regardless of this parameter.
+    priority : 'weight' or 'loss', default: 'weight'
+        If 'weight', the slots are divided in proportion to the weights
+        of the learners. If 'loss', in proportion to the weight times
+        the loss of the learners, such that the slots go where the most
+        improvement is expected. Each learner gets at least one slot,
+        so the executor is oversubscribed when there are more learners
+        than slots.
+    interval : float, default: 1
+        The interval (in seconds) between two updates of the losses,
+        if 'priority' is 'loss'.
+
+    Attributes
+    ----------
+    runners : list of Runner
+        The runners of all learners that were added.
+    """
+
+    def __init__(self, executor=None, *, ioloop=None, shutdown_executor=True,
+                 priority='weight', interval=1):
+        if priority not in ('weight', 'loss'):
+            raise ValueError("'priority' must be 'weight' or 'loss'.")
+        self.priority = priority
+        self.interval = interval
+        self.ioloop = ioloop if ioloop else asyncio.get_event_loop()
+        self.shutdown_executor = shutdown_executor or (executor is None)
+        self.executor = ensure_async_executor(executor, self.ioloop)
+        self.runners = []
+        self._active = {}  # share -> runner
+        self._shares = None
+        self._shares_ncores = None
+        self._rebalancing = None
+
+    def add(self, learner, goal=None, *, weight=1, **kwargs):
+        """Start learning 'learner' until 'goal' is reached.
+
+        Parameters
+        ----------
+        learner : Learner
+        goal : callable, optional
+            The end condition for the calculation, see 'Runner'.
+        weight : float, default: 1
+            The relative number of worker slots given to this learner.
+        **kwargs
+            Passed to the 'Runner'.
+
+        Returns
+        -------
+        runner : Runner
+        """
+        if weight <= 0:
+            raise ValueError("'weight' must be positive.")
+        share = _SchedulerShare(self, weight)
+        runner = Runner(learner, share, goal, ioloop=self.ioloop,
+                        shutdown_executor=False, **kwargs)
+        self.runners.append(runner)
+        self._active[share] = runner
+        self._shares = None
+        runner.task.add_done_callback(lambda _: self._release(share))
+        if self.priority == 'loss' and self._rebalancing is None:
+            self._rebalancing = self.ioloop.create_task(self._rebalance())
+        return runner
+
+    def run_sync(self):
+        """Run until all learners are done."""
+        try:
+            while self._active:
+                tasks = [runner.task for runner in self._active.values()]
+                self.ioloop.run_until_complete(asyncio.gather(*tasks))
+        finally:
             if self.shutdown_executor:
                 self.executor.shutdown()
 
+    def _release(self, share):
+        self._active.pop(share, None)
+        self._shares = None
+
+    def share(self, share):
+        """The number of worker slots of a '_SchedulerShare'."""
+        # The number of cores may change, e.g. when a cluster is scaled.
+        ncores = self.executor.ncores
+        if self._shares is None or ncores != self._shares_ncores:
+            self._shares = self._divide(ncores)
+            self._shares_ncores = ncores
+        return self._shares.get(share, 0)
+
+    def _divide(self, ncores):
+        """Divide 'ncores' slots between the active learners, by the
+        largest remainder method."""
+        shares = list(self._active)
+        if not shares or ncores == 0:
+            return {}
+        priorities = np.array([s.priority for s in shares], dtype=float)
+        if priorities.sum() <= 0:  # e.g. all losses vanish
+            priorities = np.array([s.weight for s in shares], dtype=float)
+        exact = ncores * priorities / priorities.sum()
+        n = np.maximum(np.floor(exact), 1).astype(int)
+        remainder = ncores - n.sum()
+        if remainder > 0:
+            order = np.argsort(n - exact)  # largest remainder first
+            n[order[:remainder]] += 1
+        return dict(zip(shares, n.tolist()))
+
+    async def _rebalance(self):
+        try:
+            while self._active:
+                losses = []
+                for share, runner in list(self._active.items()):
+                    loss = await runner._call_learner(runner.learner.loss)
+                    losses.append((share, loss))
+                finite = [loss for _, loss in losses if math.isfinite(loss)]
+                # Learners without a finite loss yet get the largest one.
+                largest = max(finite, default=1) or 1
+                for share, loss in losses:
+                    if not math.isfinite(loss):
+                        loss = largest
+                    share.priority = share.weight * loss
+                self._shares = None
+                await asyncio.sleep(self.interval)
+        finally:
+            self._rebalancing = None
+
+
+def simple(learner, goal, *, log=None, stats=None):
+    """Run the learner until the goal is reached, without an executor.
+
+    Requests a single point at a time from the learner, evaluates it in
+    this process and adds the result to the learner. This maximizes the
+    number of points per second when evaluating the function is cheap,
+    because there is no overhead from an event loop or executor.
+    This function blocks until the goal is reached.
+
+    Parameters
+    ----------
+    learner : Learner
+    goal : callable
+        The end condition for the calculation. This function must take the
+        learner as its sole argument, and return True if we should stop.
+    log : list, optional
+        If provided, the method calls made to the learner are appended to
+        it, in the format used by 'replay_log'.
+    stats : RunnerStats, optional
+        If provided, the timings of the run are recorded in it.
+    """
+    function = learner.function
+    now = time.perf_counter
+    cost_aware = getattr(learner, 'cost_aware', False)
+    if log is None and stats is None:
+        while not goal(learner):
+            xs, _ = learner.choose_points(1)
+            for x in xs:
+                t_start = now()
+                y = function(x)
+                if cost_aware:
+                    learner.add_cost(x, now() - t_start)
+                learner.add_point(x, y)
+        learner.remove_unfinished()
+        return
+
+    if stats is None:
+        stats = RunnerStats()
+    stats.set_ncores(1)
+    stats.start()
+    try:
+        while True:
+            t_start = now()
+            done = goal(learner)
+            stats.goal.add(now() - t_start)
+            if done:
+                break
+
+            if log is not None:
+                log.append(('choose_points', 1))
+            t_start = now()
+            xs, _ = learner.choose_points(1)
+            stats.choose_points.add(now() - t_start)
+
+            for x in xs:
+                t_start = now()
+                y = function(x)
+                duration = now() - t_start
+                stats.evaluation.add(duration)
+                if cost_aware:
+                    if log is not None:
+                        log.append(('add_cost', x, duration))
+                    learner.add_cost(x, duration)
+                if log is not None:
+                    log.append(('add_point', x, y))
+                t_start = now()
+                learner.add_point(x, y)
+                stats.add_point.add(now() - t_start)
+    finally:
+        learner.remove_unfinished()
+        stats.stop()
+
+
+# Goals
+
+class LossGoal:
+    """Stop when the loss of the learner is smaller than 'tol'.
+
+    Parameters
+    ----------
+    tol : float
+    real : bool, default: True
+        Passed to 'learner.loss'.
+    """
+
+    def __init__(self, tol, real=True):
+        self.tol = tol
+        self.real = real
+
+    def __call__(self, learner):
+        return learner.loss(real=self.real) < self.tol
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.tol)
+
+
+class NPointsGoal:
+    """Stop when the learner has at least 'npoints' evaluated points.
+
+    The learner should have an attribute 'n' with the number of
+    evaluated points.
+    """
+
+    def __init__(self, npoints):
+        self.npoints = npoints
+
+    def __call__(self, learner):
+        return learner.n >= self.npoints
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.npoints)
+
+
+class TimeGoal:
+    """Stop when 'seconds' have passed since the goal was first checked."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self._t_start = None
+
+    def __call__(self, learner):
+        now = time.monotonic()
+        if self._t_start is None:
+            self._t_start = now
+        return now - self._t_start >= self.seconds
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.seconds)
+
+
+class IntegralGoal:
+    """Stop when the integral of an 'IntegratorLearner' is known well enough.
+
+    Parameters
+    ----------
+    tol : float, optional
+        The relative tolerance on the integral. If not provided, the
+        learner's own 'tol' is used, see 'IntegratorLearner.done'.
+    """
+
+    def __init__(self, tol=None):
+        self.tol = tol
+
+    def __call__(self, learner):
+        if self.tol is None:
+            return learner.done()
+        return learner.err < abs(learner.igral) * self.tol
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.tol)
+
+
+# Instrumentation
+
+class Timing:
+    """Aggregate of durations, with a histogram.
+
+    Attributes
+    ----------
+    count : int
+        The number of recorded durations.
+    total : float
+        The sum of the recorded durations, in seconds.
+    min, max : float
+        The shortest and longest recorded duration, in seconds.
+    histogram : list of int
+        The number of durations in logarithmic bins; bin 'i' counts the
+        durations between '2**(i-1)' and '2**i' microseconds.
+    """
+
+    nbins = 40
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = math.inf
+        self.max = 0
+        self.histogram = [0] * self.nbins
+
+    def add(self, duration, count=1):
+        """Record 'count' durations of 'duration' seconds."""
+        self.count += count
+        self.total += duration * count
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        _, i = math.frexp(duration * 1e6)
+        self.histogram[min(max(i, 0), self.nbins - 1)] += count
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def quantile(self, q):
+        """Estimate the q-th quantile from the histogram.
+
+        Returns the upper edge of the bin that contains the quantile.
+        """
+        if not self.count:
+            return math.nan
+        seen = 0
+        for i, n in enumerate(self.histogram):
+            seen += n
+            if seen >= q * self.count:
+                return min(2**i * 1e-6, self.max)
+        return self.max
+
+    def __repr__(self):
+        return ('{}(count={}, mean={:.3g}, min={:.3g}, max={:.3g})'
+                .format(self.__class__.__name__, self.count, self.mean,
+                        self.min, self.max))
+
+
+class RunnerStats:
+    """Timings of a Runner, cheap enough to always be recorded.
+
+    Attributes
+    ----------
+    goal, choose_points : Timing
+        The wall time of the calls to the goal and 'learner.choose_points'.
+    add_point : Timing
+        The wall time of 'learner.add_point', per point.
+    evaluation : Timing
+        The time it took a worker to evaluate the function, per point.
+    queueing : Timing
+        The time a task spent outside of the function, per task:
+        submitting it, waiting for a worker and returning the result.
+    ncores : int
+        The current number of cores of the executor.
+    """
+
+    _timings = ('goal', 'choose_points', 'add_point', 'evaluation',
+                'queueing')
+
+    def __init__(self):
+        for name in self._timings:
+            setattr(self, name, Timing())
+        self.ncores = 0
+        self._t_start = self._t_stop = self._t_ncores = None
+        self._core_seconds = 0
+
+    def start(self):
+        self._t_start = self._t_ncores = time.perf_counter()
+
+    def stop(self):
+        self._t_stop = time.perf_counter()
+
+    def set_ncores(self, ncores):
+        """Record that the executor has 'ncores' cores from now on."""
+        if self._t_ncores is not None and ncores != self.ncores:
+            now = time.perf_counter()
+            self._core_seconds += self.ncores * (now - self._t_ncores)
+            self._t_ncores = now
+        self.ncores = ncores
+
+    @property
+    def elapsed(self):
+        """The wall time (in seconds) since the runner started."""
+        if self._t_start is None:
+            return 0
+        t_stop = self._t_stop or time.perf_counter()
+        return t_stop - self._t_start
+
+    @property
+    def core_seconds(self):
+        """The number of cores integrated over the time of the run."""
+        if self._t_ncores is None:
+            return 0
+        t_stop = self._t_stop or time.perf_counter()
+        return self._core_seconds + self.ncores * (t_stop - self._t_ncores)
+
+    @property
+    def idle_fraction(self):
+        """The fraction of time the workers were not evaluating the
+        function."""
+        capacity = self.core_seconds
+        if not capacity:
+            return math.nan
+        return max(1 - self.evaluation.total / capacity, 0)
+
+    def snapshot(self, prefix='adaptive_runner'):
+        """Return the timings in the Prometheus text format."""
+        lines = []
+        for name in self._timings:
+            timing = getattr(self, name)
+            metric = '{}_{}_seconds'.format(prefix, name)
+            lines.append('# TYPE {} histogram'.format(metric))
+            cumulative = 0
+            for i, n in enumerate(timing.histogram):
+                cumulative += n
+                if cumulative:
+                    lines.append('{}_bucket{{le="{:g}"}} {}'
+                                 .format(metric, 2**i * 1e-6, cumulative))
+                if cumulative == timing.count:
+                    break
+            lines.append('{}_bucket{{le="+Inf"}} {}'
+                         .format(metric, timing.count))
+            lines.append('{}_sum {!r}'.format(metric, timing.total))
+            lines.append('{}_count {}'.format(metric, timing.count))
+        for name in ('ncores', 'elapsed', 'idle_fraction'):
+            metric = '{}_{}'.format(prefix, name)
+            lines.append('# TYPE {} gauge'.format(metric))
+            lines.append('{} {!r}'.format(metric, getattr(self, name)))
+        return '\n'.join(lines) + '\n'
+
+    def __repr__(self):
+        timings = ', '.join('{}={!r}'.format(name, getattr(self, name))
+                            for name in self._timings)
+        return '{}({})'.format(self.__class__.__name__, timings)
+
 
 def replay_log(learner, log):
     """Apply a sequence of method calls to a learner.
 
-    This is useful for debugging runners.
+    This is useful for debugging runners, or to restore a learner from
+    the log of a run. Consecutive 'add_cost' and 'add_point' calls are
+    applied together, the values with a single call to 'learner.add_data'.
+    If the learner accepts points that it did not choose, the
+    'choose_points' calls are skipped, such that all values are added at
+    once. The points that were chosen but not evaluated are removed at
+    the end of a run anyway.
 
     Parameters
     ----------
     learner : learner.BaseLearner
-    log : list
-        contains tuples: '(method_name, *args)'.
+    log : list, LogFile or str
+        contains tuples: '(method_name, *args)'. If a filename,
+        the log is read from this file (see 'LogFile').
     """
+    if isinstance(log, str):
+        log = LogFile(log)
+    # Only the learners that derive from 'BaseLearner' are guaranteed to
+    # implement 'add_data' in terms of 'add_point'.
+    batch = isinstance(learner, BaseLearner)
+    skip_choose = batch and learner.accepts_unchosen_points
+    costs, xs, ys = [], [], []
     for method, *args in log:
-        getattr(learner, method)(*args)
+        if batch and method == 'add_point':
+            x, y = args
+            xs.append(x)
+            ys.append(y)
+        elif batch and method == 'add_cost':
+            costs.append(args)
+        elif not (skip_choose and method == 'choose_points'):
+            _add_batch(learner, costs, xs, ys)
+            costs, xs, ys = [], [], []
+            getattr(learner, method)(*args)
+    _add_batch(learner, costs, xs, ys)
+
+
+def _add_batch(learner, costs, xs, ys):
+    # The evaluation times are added before the values, as by the Runner.
+    for x, seconds in costs:
+        learner.add_cost(x, seconds)
+    if xs:
+        learner.add_data(xs, ys)
+
+
+class LogFile:
+    """A log of method calls that is stored in an append-only file.
+
+    The records are pickled in chunks, such that memory usage is bounded
+    and a crashed run loses at most the last chunk. Iterating over a
+    'LogFile' yields the records, reading one chunk at a time.
+
+    Parameters
+    ----------
+    fname : str
+        The file to append to. It is created if it does not exist.
+    chunksize : int, default: 10000
+        The number of records that are written at once.
+    """
+
+    def __init__(self, fname, chunksize=10000):
+        self.fname = fname
+        self.chunksize = chunksize
+        self._buffer = []
+
+    def append(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.chunksize:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        if self._buffer:
+            _append_records(self.fname, self._buffer)
+            self._buffer = []
+
+    def __iter__(self):
+        self.flush()
+        if not os.path.exists(self.fname):
+            return
+        for records in _read_records(self.fname):
+            yield from records
+
+
+def _append_records(fname, records):
+    with open(fname, 'ab') as f:
+        pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_records(fname):
+    """Yield the records that were appended to 'fname' by '_append_records'.
+
+    A truncated record at the end of the file (e.g. because the process
+    was killed while writing it) is ignored.
+    """
+    with open(fname, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                return
 
 
 def ensure_async_executor(executor, ioloop):
     if executor is None:
         executor = concurrent.ProcessPoolExecutor()
+    elif isinstance(executor, _AsyncExecutor):
+        return executor
     elif isinstance(executor, concurrent.Executor):
         pass
     elif with_ipyparallel and isinstance(executor, ipyparallel.Client):
@@ -172,21 +1166,252 @@ class SequentialExecutor(concurrent.Executor):
 
 # Internal functionality
 
+# Wall time (in seconds) that a task should take when 'chunksize="auto"'.
+_target_task_duration = 0.1
+
+# The number of completed tasks before stragglers are speculated on.
+_min_latency_samples = 20
+
+
+class _Task:
+    """Points that are evaluated together, possibly by several copies."""
+
+    __slots__ = ('points', 'attempts', 'futures')
+
+    def __init__(self, points):
+        self.points = points
+        self.attempts = 0
+        self.futures = set()
+
+
+def _evaluate_chunk(function, xs, vectorized=False):
+    """Evaluate 'function' on a list of points; runs on the workers.
+
+    Returns the values and the time (in seconds) it took to compute them.
+    """
+    t_start = time.perf_counter()
+    if vectorized:
+        ys = function(np.asarray(xs))
+        if len(ys) != len(xs):
+            raise ValueError('A vectorized function must return one value '
+                             'per point.')
+        ys = list(ys)
+    else:
+        ys = [function(x) for x in xs]
+    return ys, time.perf_counter() - t_start
+
+
+# The functions that are known in this process, by key. The functions
+# of the runners in this process are kept until the runner is done.
+# Workers outlive runners (e.g. with dask), so there a function is
+# removed when it was not used for '_max_idle' seconds, while those of
+# the runners that are still going are used all the time.
+_registry = {}
+_pinned = set()
+_last_used = OrderedDict()  # key: time, from the least recently used
+_max_idle = 600
+
+
+def _register(key, function, pin=False):
+    _registry[key] = function
+    if pin:
+        _pinned.add(key)
+    _used(key)
+
+
+def _unregister(key):
+    _registry.pop(key, None)
+    _pinned.discard(key)
+    _last_used.pop(key, None)
+
+
+def _used(key):
+    """Mark the function 'key' as used, and remove the functions
+    that were not used for '_max_idle' seconds."""
+    now = time.monotonic()
+    if key not in _pinned:
+        _last_used[key] = now
+        _last_used.move_to_end(key)
+    while _last_used:
+        oldest, last_used = next(iter(_last_used.items()))
+        if now - last_used < _max_idle:
+            break
+        del _last_used[oldest]
+        _registry.pop(oldest, None)
+
+
+class _MissingFunction(Exception):
+    """Raised on a worker that does not know the function to evaluate."""
+
+
+def _evaluate_registered(key, xs, vectorized=False, function=None,
+                         out=None):
+    """Evaluate the function registered as 'key'; runs on the workers.
+
+    If 'function' is provided, it is registered first. If 'out' is
+    provided, the values are written to these '_SharedSlots' if possible.
+    """
+    if function is not None:
+        _register(key, function)
+    try:
+        function = _registry[key]
+    except KeyError:  # never registered, or removed since
+        raise _MissingFunction(key) from None
+    _used(key)
+    ys, duration = _evaluate_chunk(function, xs, vectorized)
+    if out is not None:
+        ys = out.write(ys)
+    return ys, duration
+
+
+# Shared memory transport of results
+
+class _InSharedMemory:
+    """Placeholder for a value that was written to shared memory."""
+
+
+class _SharedSlots:
+    """Slots in a block of shared memory, one per point of a task."""
+
+    def __init__(self, fname, size, shape, dtype, slots):
+        self.fname = fname
+        self.size = size
+        self.shape = shape
+        self.dtype = dtype
+        self.slots = slots
+
+    def write(self, values):
+        """Write the values that fit in the slots, and replace them by
+        '_InSharedMemory'; runs on the workers."""
+        buffer = _open_blocks.pop(self.fname, None)
+        if buffer is None:
+            try:
+                with open(self.fname, 'r+b') as f:
+                    buffer = mmap.mmap(f.fileno(), self.size)
+            except OSError:
+                return values  # e.g. the worker is on another machine
+        # Only keep the most recently used blocks mapped, because
+        # the runner reuses the slots of the first blocks.
+        _open_blocks[self.fname] = buffer
+        while len(_open_blocks) > 2:
+            _open_blocks.pop(next(iter(_open_blocks))).close()
+
+        dtype = np.dtype(self.dtype)
+        itemsize = int(np.prod(self.shape)) * dtype.itemsize
+        result = []
+        for y, (_, i) in zip(values, self.slots):
+            y_dtype = np.asarray(y).dtype
+            if (np.shape(y) == self.shape
+                and np.can_cast(y_dtype, dtype, 'safe')):
+                out = np.ndarray(self.shape, dtype, buffer=buffer,
+                                 offset=i * itemsize)
+                out[...] = y
+                result.append(_InSharedMemory())
+            else:
+                result.append(y)
+        return result
+
+
+# The blocks of shared memory that this (worker) process has mapped.
+_open_blocks = {}
+
+
+class _SharedArena:
+    """Allocates slots for values of a fixed shape and dtype in blocks of
+    shared memory.
+
+    The values are copied out of the slots when they are received, after
+    which the slots are reused for later tasks. The slots of tasks that
+    were cancelled are not reused, because the task may still write to
+    them.
+    """
+
+    block_bytes = 2**26
+
+    def __init__(self, shape, dtype):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.itemsize = max(int(np.prod(shape)) * self.dtype.itemsize, 1)
+        self.slots_per_block = max(self.block_bytes // self.itemsize, 1)
+        self.size = self.slots_per_block * self.itemsize
+        # '/dev/shm' is a RAM-backed file system on Linux.
+        self.dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        self._blocks = {}
+        self._free = {}  # fname -> free slots of the block
+
+    def _new_block(self):
+        fd, fname = tempfile.mkstemp(prefix='adaptive-', dir=self.dir)
+        try:
+            os.ftruncate(fd, self.size)
+            self._blocks[fname] = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        self._free[fname] = list(range(self.slots_per_block - 1, -1, -1))
+        return fname
+
+    def allocate(self, n):
+        """Return 'n' slots in a single block, or None if they do not fit."""
+        if n > self.slots_per_block:
+            return None
+        # Prefer the first blocks, which the workers keep mapped.
+        fname = next((fname for fname, free in self._free.items()
+                      if len(free) >= n), None)
+        if fname is None:
+            fname = self._new_block()
+        free = self._free[fname]
+        slots = [(fname, free.pop()) for _ in range(n)]
+        return _SharedSlots(fname, self.size, self.shape,
+                            self.dtype.str, slots)
+
+    def read(self, slot):
+        """Return a copy of the value in 'slot'."""
+        fname, i = slot
+        return np.ndarray(self.shape, self.dtype, buffer=self._blocks[fname],
+                          offset=i * self.itemsize).copy()
+
+    def release(self, out):
+        """Make the slots of '_SharedSlots' available again."""
+        self._free[out.fname].extend(i for _, i in out.slots)
+
+    def unlink(self):
+        """Unmap and remove the blocks."""
+        for fname, buffer in self._blocks.items():
+            buffer.close()
+            os.unlink(fname)
+        self._blocks = {}
+        self._free = {}
+
+
 class _AsyncExecutor:
 
+    # The minimal interval (in seconds) between two requests of the
+    # number of cores, which may involve a round-trip to a scheduler.
+    ncores_interval = 1
+
     def __init__(self, executor, ioloop):
         assert isinstance(executor, concurrent.Executor)
         self.executor = executor
         self.ioloop = ioloop
+        self._ncores = None
+        self._ncores_time = -math.inf
 
     def submit(self, f, *args, **kwargs):
-        return self.ioloop.run_in_executor(self.executor, f, *args, **kwargs)
+        """Return the 'concurrent.futures.Future' of 'f(*args, **kwargs)'."""
+        return self.executor.submit(f, *args, **kwargs)
 
     def shutdown(self, wait=True):
         self.executor.shutdown(wait=wait)
 
     @property
     def ncores(self):
+        """The number of worker slots that are currently available."""
+        now = time.monotonic()
+        if now - self._ncores_time >= self.ncores_interval:
+            self._ncores = self._get_ncores()
+            self._ncores_time = now
+        return self._ncores
+
+    def _get_ncores(self):
         ex = self.executor
         if with_ipyparallel and isinstance(ex, ipyparallel.client.view.ViewExecutor):
             return len(ex.view)
@@ -196,13 +1421,31 @@ class _AsyncExecutor:
         elif isinstance(ex, SequentialExecutor):
             return 1
         elif with_distributed and isinstance(ex, distributed.cfexecutor.ClientExecutor):
-            # XXX: check if not sum(n for n in ex._client.ncores().values())
-            return len(ex._client.ncores())
+            # The number of threads of all workers.
+            return sum(ex._client.ncores().values())
         else:
             raise TypeError('Cannot get number of cores for {}'
                             .format(ex.__class__))
 
 
+class _SchedulerShare(_AsyncExecutor):
+    """The part of the executor of a 'Scheduler' given to one runner."""
+
+    def __init__(self, scheduler, weight):
+        self.scheduler = scheduler
+        self.executor = scheduler.executor.executor
+        self.ioloop = scheduler.ioloop
+        self.ncores_interval = scheduler.executor.ncores_interval
+        self.weight = self.priority = weight
+
+    def shutdown(self, wait=True):
+        pass  # the executor is shut down by the scheduler
+
+    @property
+    def ncores(self):
+        return self.scheduler.share(self)
+
+
 def in_ipynb():
     try:
         return get_ipython().__class__.__name__ == 'ZMQInteractiveShell'
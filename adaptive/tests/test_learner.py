@@ -7,6 +7,7 @@ import functools as ft
 import random
 import math
 import numpy as np
+import scipy.interpolate
 import scipy.spatial
 
 import pytest
@@ -339,4 +340,372 @@ def test_learner_subdomain(learner_type, f, learner_kwargs):
     """Learners that never receive data outside of a subdomain should
        perform 'similarly' to learners defined on that subdomain only."""
     # XXX: not sure how to implement this. How do we measure "performance"?
-    raise NotImplementedError()
\ No newline at end of file
+    raise NotImplementedError()
+
+
+@pytest.mark.parametrize('learner_type, bounds', [
+    (Learner1D, (-1, 1)),
+    (Learner2D, ((-1, 1), (-1, 1))),
+])
+def test_cost_aware_learner_prefers_cheap_points(learner_type, bounds):
+    def f(x):
+        return np.sum(x)
+
+    def cost(x):
+        return 100 if np.ravel(x)[0] > 0 else 1
+
+    learner = learner_type(f, bounds=bounds, cost_aware=True)
+    for _ in range(200):
+        xs, _ = learner.choose_points(1)
+        for x in xs:
+            learner.add_cost(x, cost(x))
+            learner.add_point(x, f(x))
+
+    n_expensive = sum(np.ravel(x)[0] > 0 for x in learner.data)
+    assert n_expensive < learner.n / 4
+
+
+def test_cost_aware_balancing_learner():
+    learners = [Learner1D(lambda x: x, bounds=(-1, 1)) for _ in range(2)]
+    learner = BalancingLearner(learners, cost_aware=True)
+    for _ in range(100):
+        xs, _ = learner.choose_points(1)
+        for index, x in xs:
+            learner.add_cost((index, x), 10 if index else 1)
+            learner.add_point((index, x), x)
+    assert learners[0].n > 2 * learners[1].n
+
+    # The costs are passed on to the learners that use them.
+    learners = [Learner1D(lambda x: x, bounds=(-1, 1), cost_aware=aware)
+                for aware in [True, False]]
+    learner = BalancingLearner(learners)
+    assert learner.cost_aware
+    for index in range(2):
+        learner.add_cost((index, 0.5), 1)
+    assert learners[0].costs == {0.5: 1} and not learners[1].costs
+    assert not BalancingLearner([learners[1]]).cost_aware
+
+
+def test_learner1D_choose_points_from_largest_losses():
+    """Only considering the intervals with the largest losses gives the
+    same points as considering all intervals."""
+    def f(x):
+        return np.tanh(20 * x)
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    control = Learner1D(f, bounds=(-1, 1), cost_aware=True)  # all intervals
+    for n in [1, 2, 10, 1, 50, 3, 100]:
+        xs, ls = learner.choose_points(n)
+        cxs, cls = control.choose_points(n)
+        assert sorted(zip(xs, ls)) == sorted(zip(cxs, cls))
+        for x in xs[::2]:
+            learner.add_point(x, f(x))
+            control.add_point(x, f(x))
+        assert learner.loss() == max(learner.losses.values(), default=np.inf)
+        assert (learner.loss(real=False)
+                == max(learner.losses_combined.values(), default=np.inf))
+
+
+def test_learner1D_nan_losses():
+    """Intervals with a loss of nan are chosen last."""
+    def f(x):
+        return np.nan if abs(x - 0.3) < 0.01 else np.sin(10 * x)
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    while learner.n < 300:
+        xs, _ = learner.choose_points(3)
+        for x in xs:
+            learner.add_point(x, f(x))
+    losses = list(learner.losses.values())
+    assert any(np.isnan(losses))
+    assert learner.loss() == np.nanmax(losses)
+    (_, loss), = learner.losses.largest(1)
+    assert loss == learner.loss()
+
+
+@pytest.mark.parametrize('vdim', [1, 3])
+def test_learner1D_local_interpolation(vdim):
+    """The unknown points are interpolated as by 'interpolate', which
+    uses all the data."""
+    def f(x):
+        return np.sin(np.arange(1, vdim + 1) * x) if vdim > 1 else np.sin(x)
+
+    random.seed(vdim)
+    learner = Learner1D(f, bounds=(-3, 3))
+    for _ in range(30):
+        xs, _ = learner.choose_points(random.randint(1, 10))
+        random.shuffle(xs)
+        for x in xs[:len(xs) // 2]:
+            learner.add_point(x, f(x))
+        expected = learner.interpolate()
+        if learner.n >= 2:
+            for x, y in learner.data_interp.items():
+                np.testing.assert_allclose(y, expected[x], atol=1e-14)
+        combined = learner.data_combined
+        assert list(combined) == list(learner.data) + list(learner.data_interp)
+        for x in learner.data:
+            np.testing.assert_array_equal(combined[x], learner.data[x])
+
+
+def test_learner1D_point_requested_again():
+    """A point that is requested again after it was evaluated
+    keeps its value and does not become unknown."""
+    learner = Learner1D(np.sin, bounds=(-3, 3))
+    learner.add_point(-3, np.sin(-3))
+    xs, _ = learner.choose_points(5)  # the bounds and points between them
+    assert -3 in xs
+    assert -3 not in learner.data_interp
+    for x in xs[1:]:
+        learner.add_point(x, np.sin(x))
+    assert not learner.data_interp
+    expected = learner.interpolate(extra_points=[-2])
+    learner.add_point(-2, None)
+    np.testing.assert_allclose(learner.data_interp[-2], expected[-2])
+    learner.remove_unfinished()
+    assert learner.losses_combined == learner.losses
+
+
+@pytest.mark.parametrize('vdim', [1, 3])
+def test_learner1D_vectorized_loss(vdim):
+    def f(x):
+        return np.exp(np.arange(1, vdim + 1) * x) if vdim > 1 else np.exp(x)
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    control = Learner1D(f, bounds=(-1, 1),
+                        loss_per_interval=learner.loss_per_interval)
+    assert control.loss_per_interval_vectorized is None
+    for _ in range(100):
+        xs, _ = learner.choose_points(3)
+        control.choose_points(3)
+        for x in xs[:2]:
+            learner.add_point(x, f(x))
+            control.add_point(x, f(x))
+        for losses in ['losses', 'losses_combined']:
+            a, b = getattr(learner, losses), getattr(control, losses)
+            assert a.keys() == b.keys()
+            np.testing.assert_allclose([a[i] for i in a], [b[i] for i in a])
+
+    # Only a vectorized loss.
+    def dx(x_left, x_right, y_left, y_right, scale):
+        return x_right - x_left
+
+    learner = Learner1D(f, bounds=(-1, 1), loss_per_interval_vectorized=dx)
+    learner.add_data([-1, 0, 1], [f(-1), f(0), f(1)])
+    assert learner.loss() == 1
+
+
+def test_learner1D_array_storage():
+    def f(x):
+        return np.cos(np.arange(100) * x)
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    for _ in range(50):
+        xs, _ = learner.choose_points(5)
+        learner.add_data(xs, [f(x) for x in xs])
+    assert list(learner.data) == sorted(learner.data)
+    xs, ys = learner.data.arrays()
+    assert ys.shape == (learner.n, 100)
+    np.testing.assert_array_equal(ys, [f(x) for x in xs])
+
+    x = xs[10]
+    learner.add_point(x, 2 * f(x))  # overwrite
+    np.testing.assert_array_equal(learner.data[x], 2 * f(x))
+    assert learner.neighbors[x] == [xs[9], xs[11]]
+    assert learner.neighbors[xs[0]] == [None, xs[1]]
+
+
+def test_learner1D_remove_unfinished():
+    def f(x):
+        return np.tanh(10 * x)
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    for n in [3, 10, 1, 20, 5]:
+        xs, _ = learner.choose_points(n)
+        for x in xs[1::3]:
+            learner.add_point(x, f(x))
+        assert learner.data_interp
+        learner.remove_unfinished()
+        assert not learner.data_interp
+        assert list(learner.neighbors_combined) == list(learner.data)
+        assert dict(learner.losses_combined) == dict(learner.losses)
+        assert learner.loss(real=False) == learner.loss()
+
+
+@pytest.mark.parametrize('vdim', [1, 3])
+def test_learner1D_bulk_loading(vdim):
+    def f(x):
+        return np.sin(np.arange(1, vdim + 1) * x) if vdim > 1 else np.sin(x)
+
+    xs = np.random.uniform(-3, 3, 500)
+    learner = Learner1D(f, bounds=(-3, 3))
+    control = Learner1D(f, bounds=(-3, 3))
+    for part in [xs[:10], xs[10:]]:
+        learner.add_data(part, np.array([f(x) for x in part]))
+    for x in xs:
+        control.add_point(x, f(x))
+    control.losses = control._compute_losses(control.losses, control.data)
+
+    assert list(learner.data) == list(control.data)
+    assert list(learner.neighbors_combined) == list(control.data)
+    assert learner.losses.keys() == control.losses.keys()
+    np.testing.assert_allclose([learner.losses[i] for i in learner.losses],
+                               [control.losses[i] for i in learner.losses])
+    assert learner.loss(real=False) == learner.loss()
+
+    # The learner continues as usual.
+    xs, _ = learner.choose_points(10)
+    learner.add_data(xs, [f(x) for x in xs])
+    assert learner.n == 510 and not learner.data_interp
+
+
+def test_learner1D_closed_form_allocation(monkeypatch):
+    from ..learner import learner1D
+
+    for _ in range(50):
+        losses = np.random.exponential(size=random.randint(1, 300))
+        losses[:len(losses) // 5] = 1  # some ties
+        order = np.random.permutation(len(losses))
+        n = random.randint(32, 3000)
+        npoints = learner1D._allocate_points(losses, n, order)
+        with monkeypatch.context() as m:
+            m.setattr(learner1D, '_min_closed_form_npoints', np.inf)
+            expected = learner1D._allocate_points(losses, n, order)
+        assert npoints.sum() == n
+        assert max(losses / (npoints + 1)) == max(losses / (expected + 1))
+
+
+def test_learner2D_incremental_triangulation():
+    def f(xy):
+        x, y = xy
+        return np.sin(3 * x) * y
+
+    def simplices(tri):
+        return {frozenset(s) for s in tri.simplices.tolist()}
+
+    learner = Learner2D(f, bounds=[(-1, 1), (-2, 2)])
+    xs, _ = learner.choose_points(4)  # the corners
+    learner.add_data(xs, [f(x) for x in xs])
+    points = [tuple(x) for x in np.random.uniform(-1, 1, (200, 2)) * (1, 2)]
+    for i, x in enumerate(points):
+        learner.add_point(x, f(x) if i % 3 else None)
+        if i % 50 == 0:
+            learner.ip_combined()
+
+    for ip in [learner.ip(), learner.ip_combined()]:
+        assert simplices(ip.tri) == simplices(scipy.spatial.Delaunay(ip.tri.points))
+    assert len(learner.ip_combined().tri.points) == 204
+
+    ip = learner.ip()
+    control = scipy.interpolate.LinearNDInterpolator(ip.tri.points,
+                                                     ip.values.ravel())
+    xy = np.random.uniform(-0.5, 0.5, (100, 2))
+    np.testing.assert_allclose(ip(xy), control(xy))
+
+    learner.remove_unfinished()
+    assert simplices(learner.ip_combined().tri) == simplices(learner.ip().tri)
+    xs, _ = learner.choose_points(10)
+    assert len(learner.ip_combined().tri.points) == learner.n + 10
+
+
+def test_learner2D_delaunay_fallback(monkeypatch):
+    """Without '_make_delaunay' the points are triangulated by Qhull,
+    which gives the same interpolation and losses."""
+    from adaptive.learner import learner2D
+
+    def f(xy):
+        x, y = xy
+        return x + np.exp(-(x**2 + y**2 - 0.75**2)**2 / 0.01)
+
+    learners = []
+    for supported in [True, False]:
+        monkeypatch.setattr(learner2D, '_can_make_delaunay',
+                            lambda: supported)
+        learner = Learner2D(f, bounds=[(-1, 1), (-1, 1)])
+        for _ in range(10):
+            xs, _ = learner.choose_points(10)
+            learner.add_data(xs, [f(x) for x in xs])
+        learners.append(learner)
+    a, b = learners
+    assert dict(a.data) == dict(b.data)
+    assert a.loss() == pytest.approx(b.loss())
+    xy = np.random.uniform(-1, 1, (100, 2))
+    np.testing.assert_allclose(a.ip()(xy), b.ip()(xy))
+
+
+def test_learner2D_cached_losses():
+    """The losses of the triangles that are kept up to date are the
+    losses of the interpolation."""
+    from adaptive.learner.learner2D import _default_loss_per_triangle
+
+    def f(xy):
+        x, y = xy
+        return x + np.exp(-(x**2 + y**2 - 0.75**2)**2 / 0.01)
+
+    def losses(learner, ip, real=True):
+        simplices, _, losses = learner._default_losses(real).arrays()
+        cached = dict(zip(map(frozenset, simplices.tolist()), losses))
+        return [cached[frozenset(s)] for s in ip.tri.simplices.tolist()]
+
+    learner = Learner2D(f, bounds=[(-1, 1), (-1, 1)])
+    for _ in range(20):
+        xs, _ = learner.choose_points(20)
+        learner.add_data(xs[:15], [f(x) for x in xs[:15]])
+        for real, ip in [(True, learner.ip()), (False, learner.ip_combined())]:
+            expected = _default_loss_per_triangle(ip)
+            np.testing.assert_allclose(losses(learner, ip, real), expected,
+                                       atol=1e-6 * expected.max())
+        assert learner.loss() == max(losses(learner, learner.ip()))
+    learner.remove_unfinished()
+    assert learner.loss(real=False) == learner.loss()
+
+
+def test_learner2D_pending_points_on_the_bounds(monkeypatch):
+    """Pending points on the bounds are interpolated in a finite triangle,
+    also if the search for them starts in a triangle at infinity."""
+    from adaptive.learner.learner2D import _Triangulation
+
+    def f(xy):
+        x, y = xy
+        return x + np.exp(-(x**2 + y**2 - 0.75**2)**2 / 0.01)
+
+    learner = Learner2D(f, bounds=[(-1, 1), (-1, 1)])
+    xs, _ = learner.choose_points(4)  # the corners
+    learner.add_data(xs, [f(x) for x in xs])
+    random.seed(0)
+    for _ in range(30):
+        x = (random.uniform(-1, 1), random.uniform(-1, 1))
+        learner.add_point(x, f(x))
+
+    monkeypatch.setattr(_Triangulation, '_start',
+                        lambda self, v: self._vertex_triangle[0])
+    for x in [(-1, -0.5), (0.3, 1), (1, 0.1), (-0.7, -1)]:
+        learner.add_point(x, None)
+    assert np.isfinite(learner.loss(real=False))
+    xs, _ = learner.choose_points(10)
+    assert len(xs) == 10
+
+
+def test_learner2D_loss_without_new_points(monkeypatch):
+    """The gradients are not estimated again if no points were added."""
+    def f(xy):
+        x, y = xy
+        return x * y
+
+    learner = Learner2D(f, bounds=[(-1, 1), (-1, 1)])
+    xs, _ = learner.choose_points(100)
+    learner.add_data(xs, [f(x) for x in xs])
+    loss = learner.loss()
+
+    calls = []
+    estimate = scipy.interpolate.interpnd.estimate_gradients_2d_global
+    monkeypatch.setattr(scipy.interpolate.interpnd,
+                        'estimate_gradients_2d_global',
+                        lambda *args, **kwargs: calls.append(args)
+                        or estimate(*args, **kwargs))
+    for _ in range(10):
+        assert learner.loss() == loss
+    assert not calls
+    x = (0.1, 0.2)
+    learner.add_point(x, f(x))
+    learner.loss()
+    assert len(calls) == 1
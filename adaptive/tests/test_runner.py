@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import collections
+import concurrent.futures as concurrent
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from .. import runner as runner_module
+from ..cache import EvaluationCache
+from ..learner import (Learner1D, Learner2D, BalancingLearner,
+                       IntegratorLearner)
+from ..runner import (Runner, Scheduler, SequentialExecutor, LossGoal,
+                      NPointsGoal, IntegralGoal, TimeGoal, RunnerStats,
+                      replay_log, simple, LogFile)
+
+
+def blocking_runner(learner, goal, executor=None, **kwargs):
+    # Every test gets a fresh event loop, such that a failing runner
+    # does not leave tasks behind in the loop of the next test.
+    ioloop = asyncio.new_event_loop()
+    executor = executor or SequentialExecutor()
+    try:
+        runner = Runner(learner, executor=executor, goal=goal,
+                        ioloop=ioloop, **kwargs)
+        runner.run_sync()
+    finally:
+        ioloop.close()
+    return runner
+
+
+def quadratic(x):
+    return x**2
+
+
+def ring(xy):
+    x, y = xy
+    return x + np.exp(-(x**2 + y**2 - 0.75**2)**2 / 0.2**4)
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 'auto'])
+def test_chunked_evaluation(chunksize):
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    blocking_runner(learner, lambda l: l.n >= 50, chunksize=chunksize)
+    assert learner.n >= 50
+    assert all(y == quadratic(x) for x, y in learner.data.items())
+    assert not learner.data_interp
+
+
+def test_vectorized_function():
+    def f(xys):
+        assert xys.shape[1:] == (2,)
+        return [ring(xy) for xy in xys]
+
+    learner = Learner2D(f, bounds=[(-1, 1), (-1, 1)])
+    blocking_runner(learner, lambda l: l.n >= 20, chunksize=5,
+                    vectorized=True)
+    assert all(np.isclose(y, ring(xy)) for xy, y in learner.data.items())
+
+
+def test_invalid_chunksize():
+    with pytest.raises(ValueError):
+        Runner(Learner1D(quadratic, bounds=(-1, 1)),
+               executor=SequentialExecutor(), chunksize=0)
+
+
+def test_tasks_per_core():
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    runner = blocking_runner(learner, lambda l: l.n >= 50, log=True,
+                             chunksize=2, tasks_per_core=3)
+    # The first request fills all 3 slots of the single core.
+    assert runner.log[0] == ('choose_points', 6)
+    assert all(y == quadratic(x) for x, y in learner.data.items())
+
+
+def test_learner_thread():
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    threads = set()
+    choose_points = learner.choose_points
+
+    def recording_choose_points(n, add_data=True):
+        threads.add(threading.get_ident())
+        return choose_points(n, add_data)
+
+    learner.choose_points = recording_choose_points
+    blocking_runner(learner, lambda l: l.n >= 50, learner_thread=True)
+    assert learner.n >= 50
+    assert threads and threading.get_ident() not in threads
+    assert not learner.data_interp
+
+
+def test_many_tasks_in_flight():
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    executor = concurrent.ThreadPoolExecutor(4)
+    blocking_runner(learner, lambda l: l.n >= 1000, executor=executor,
+                    tasks_per_core=50)
+    assert all(y == quadratic(x) for x, y in learner.data.items())
+    assert not learner.data_interp
+
+
+def resume_blocking(fname, learner, goal):
+    ioloop = asyncio.new_event_loop()
+    try:
+        runner = Runner.resume(fname, learner, SequentialExecutor(),
+                               goal=goal, ioloop=ioloop)
+        runner.run_sync()
+    finally:
+        ioloop.close()
+
+
+def test_save_and_resume(tmpdir):
+    fname = str(tmpdir.join('learner.pickle'))
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    blocking_runner(learner, lambda l: l.n >= 50, save_path=fname,
+                    save_every=0)
+
+    resumed = Learner1D(quadratic, bounds=(-1, 1))
+    resume_blocking(fname, resumed, lambda l: True)
+    assert dict(resumed.data) == dict(learner.data)
+    resume_blocking(fname, resumed, lambda l: l.n >= 100)
+
+    # The points of both runs are in the file.
+    restored = Learner1D(quadratic, bounds=(-1, 1))
+    resume_blocking(fname, restored, lambda l: True)
+    assert restored.n >= 100
+    assert dict(restored.data) == dict(resumed.data)
+
+
+def test_resume_from_truncated_file(tmpdir):
+    fname = str(tmpdir.join('learner.pickle'))
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    blocking_runner(learner, lambda l: l.n >= 50, save_path=fname)
+    with open(fname, 'ab') as f:
+        f.write(b'\x80\x04\x95garbage')
+
+    restored = Learner1D(quadratic, bounds=(-1, 1))
+    resume_blocking(fname, restored, lambda l: True)
+    assert dict(restored.data) == dict(learner.data)
+
+
+def test_log_file(tmpdir):
+    fname = str(tmpdir.join('learner.log'))
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    runner = blocking_runner(learner, lambda l: l.n >= 50, log=fname,
+                             chunksize=5)
+    assert isinstance(runner.log, LogFile)
+    records = list(LogFile(fname))
+    assert records[0] == ('choose_points', 5)
+    assert sum(method == 'add_point' for method, *_ in records) == 50
+
+    replayed = Learner1D(quadratic, bounds=(-1, 1))
+    replay_log(replayed, fname)
+    assert dict(replayed.data) == dict(learner.data)
+
+
+def test_replay_log_in_bulk(tmpdir, monkeypatch):
+    fname = str(tmpdir.join('learner.log'))
+    learner = Learner1D(quadratic, bounds=(-1, 1), cost_aware=True)
+    blocking_runner(learner, lambda l: l.n >= 50, log=fname, chunksize=5)
+
+    # All values are added with a single call, without 'add_point'.
+    replayed = Learner1D(quadratic, bounds=(-1, 1), cost_aware=True)
+    calls = []
+    add_data = replayed.add_data
+    monkeypatch.setattr(replayed, 'add_data',
+                        lambda xs, ys: calls.append(len(xs))
+                        or add_data(xs, ys))
+    monkeypatch.setattr(replayed, 'add_point', None)
+    replay_log(replayed, fname)
+    assert calls == [50]
+    assert dict(replayed.data) == dict(learner.data)
+    assert replayed.costs == learner.costs
+    assert replayed.loss() == learner.loss()
+
+    # Learners that only accept the points they chose still choose them.
+    learner = IntegratorLearner(np.exp, bounds=(0, 1), tol=1e-8)
+    runner = blocking_runner(learner, IntegralGoal(), log=True)
+    replayed = IntegratorLearner(np.exp, bounds=(0, 1), tol=1e-8)
+    replay_log(replayed, runner.log)
+    assert replayed.done_points == learner.done_points
+
+
+def test_log_file_chunks(tmpdir):
+    log = LogFile(str(tmpdir.join('learner.log')), chunksize=3)
+    records = [('add_point', x, x**2) for x in range(10)]
+    for record in records:
+        log.append(record)
+    assert len(list(runner_module._read_records(log.fname))) == 3
+    assert list(log) == records  # also writes the last, partial chunk
+
+
+def test_stats():
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    runner = blocking_runner(learner, lambda l: l.n >= 50, chunksize=5)
+    stats = runner.stats
+    assert stats.evaluation.count == stats.add_point.count == learner.n
+    assert stats.queueing.count == learner.n // 5
+    assert stats.goal.count == stats.choose_points.count + 1
+    assert 0 <= stats.idle_fraction <= 1
+    assert stats.evaluation.min <= stats.evaluation.quantile(0.5)
+
+    snapshot = stats.snapshot()
+    assert 'adaptive_runner_add_point_seconds_count {}'.format(learner.n) \
+        in snapshot.splitlines()
+
+
+@pytest.mark.parametrize('schedule', [
+    dict(goal_npoints=10),
+    dict(goal_npoints=10, goal_interval=3600),
+])
+def test_throttled_goal(schedule):
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    runner = blocking_runner(learner, NPointsGoal(25), **schedule)
+    assert runner.stats.goal.count == 4  # after 0, 10, 20 and 30 points
+    assert learner.n == 30
+
+
+def test_goals():
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    blocking_runner(learner, LossGoal(0.05))
+    assert learner.loss() < 0.05
+
+    learner = IntegratorLearner(np.exp, bounds=(0, 1), tol=1e-8)
+    blocking_runner(learner, IntegralGoal())
+    assert learner.done()
+    assert abs(learner.igral - (np.e - 1)) < 1e-8
+
+    learners = [Learner1D(quadratic, bounds=(-1, 1)) for _ in range(3)]
+    learner = BalancingLearner(learners)
+    blocking_runner(learner, NPointsGoal(30))
+    assert learner.n == sum(l.n for l in learners) >= 30
+
+
+def test_evaluation_cache(tmpdir):
+    fname = str(tmpdir.join('cache.sqlite'))
+    evaluated = []
+
+    def f(x):
+        evaluated.append(x)
+        return quadratic(x)
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    blocking_runner(learner, lambda l: l.n >= 50,
+                    cache=EvaluationCache(fname))
+    assert len(evaluated) == 50
+
+    # The same points are chosen again, and are all taken from the cache.
+    evaluated.clear()
+    control = Learner1D(f, bounds=(-1, 1))
+    cache = EvaluationCache(fname)
+    blocking_runner(control, lambda l: l.n >= 50, cache=cache)
+    assert not evaluated
+    assert cache.hits == 50
+    assert dict(control.data) == dict(learner.data)
+
+
+def test_evaluation_cache_eviction(tmpdir):
+    cache = EvaluationCache(str(tmpdir.join('cache.sqlite')), maxsize=10)
+    cache.set_many(range(10), range(10))
+    cache[0]  # 0 is now the most recently used
+    cache.set_many([10, 11], [10, 11])
+    assert len(cache) == 10
+    assert 0 in cache and 10 in cache and 11 in cache
+    assert 1 not in cache and 2 not in cache
+    assert cache[np.int64(3)] == 3
+
+    # Values that are replaced do not count as new values.
+    cache.set_many([0, 10], [100, 110])
+    assert len(cache) == cache._size == 10
+    assert cache[0] == 100 and 4 in cache
+
+
+def test_simple():
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    simple(learner, NPointsGoal(100))
+    assert learner.n == 100
+
+    # The log and stats are optional, and do not change the result.
+    log, stats = [], RunnerStats()
+    control = Learner1D(quadratic, bounds=(-1, 1))
+    simple(control, NPointsGoal(100), log=log, stats=stats)
+    assert dict(control.data) == dict(learner.data)
+    assert stats.evaluation.count == stats.add_point.count == 100
+
+    replayed = Learner1D(quadratic, bounds=(-1, 1))
+    replay_log(replayed, log)
+    assert dict(replayed.data) == dict(learner.data)
+
+
+def test_function_is_sent_only_to_workers_without_it():
+    # Mimic a worker process that did not inherit the function.
+    submitted = []
+
+    class Executor(SequentialExecutor):
+        def submit(self, fn, *args):
+            submitted.append(args[3])  # the function, if sent
+            return super().submit(fn, *args)
+
+    ioloop = asyncio.new_event_loop()
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    runner = Runner(learner, Executor(), goal=lambda l: l.n >= 10,
+                    ioloop=ioloop)
+    del runner_module._registry[runner._function_key]
+    runner.run_sync()
+    ioloop.close()
+
+    assert learner.n == 10
+    # Only the first task misses, and is resubmitted with the function.
+    assert submitted[:2] == [None, quadratic]
+    assert all(f is None for f in submitted[2:])
+    assert runner._function_key not in runner_module._registry
+
+
+def test_idle_registered_functions_are_removed(monkeypatch):
+    now = [0]
+    monkeypatch.setattr(runner_module.time, 'monotonic', lambda: now[0])
+    pinned = 'function of a runner'
+    runner_module._register(pinned, quadratic, pin=True)
+    keys = ['function {}'.format(i) for i in range(50)]
+    try:
+        for key in keys:
+            runner_module._evaluate_registered(key, [1], function=quadratic)
+        registry = runner_module._registry
+        # Many functions that are in use are all kept.
+        for _ in range(3):
+            now[0] += runner_module._max_idle / 2
+            for key in keys[1:]:
+                runner_module._evaluate_registered(key, [1])
+        assert all(key in registry for key in keys[1:])
+        assert keys[0] not in registry
+        with pytest.raises(runner_module._MissingFunction):
+            runner_module._evaluate_registered(keys[0], [1])
+        # The functions of runners in this process are never removed.
+        assert pinned in registry
+    finally:
+        for key in keys + [pinned]:
+            runner_module._unregister(key)
+
+
+def spectrum(x):
+    return np.sin(np.arange(100) * x)
+
+
+@pytest.mark.parametrize('chunksize', [1, 3])
+def test_shared_memory(chunksize, monkeypatch):
+    # Blocks of 8 values, and count the blocks and the values read.
+    Arena = runner_module._SharedArena
+    monkeypatch.setattr(Arena, 'block_bytes', 8 * spectrum(0).nbytes)
+    blocks, reads = [], []
+    new_block, read = Arena._new_block, Arena.read
+    monkeypatch.setattr(Arena, '_new_block',
+                        lambda self: blocks.append(None) or new_block(self))
+    monkeypatch.setattr(Arena, 'read',
+                        lambda self, slot: reads.append(slot)
+                        or read(self, slot))
+
+    learner = Learner1D(spectrum, bounds=(-1, 1))
+    executor = concurrent.ProcessPoolExecutor(2)
+    runner = blocking_runner(learner, lambda l: l.n >= 60, executor=executor,
+                             chunksize=chunksize, shared_memory=True)
+    assert learner.n >= 60
+    for x, y in learner.data.items():
+        assert np.array_equal(y, spectrum(x))
+    # All but the first results are sent through shared memory, and
+    # the slots are reused once their values are received.
+    assert len(reads) >= learner.n - 2 * chunksize
+    assert len(blocks) <= 2
+    assert not runner._arena._blocks  # unmapped at the end
+
+
+def test_shared_memory_only_exact_values():
+    # Values that would lose precision are returned normally.
+    arena = runner_module._SharedArena((3,), np.float32)
+    try:
+        out = arena.allocate(4)
+        values = [np.ones(3, np.float32), np.full(3, 0.1), np.arange(3),
+                  np.arange(3, dtype=np.int16)]
+        written = out.write(values)
+        kinds = [isinstance(y, runner_module._InSharedMemory)
+                 for y in written]
+        assert kinds == [True, False, False, True]
+        assert written[1] is values[1] and written[2] is values[2]
+        for y, slot, kind in zip(values, out.slots, kinds):
+            if kind:
+                assert np.array_equal(arena.read(slot), y)
+    finally:
+        arena.unlink()
+
+
+def test_elastic_number_of_workers(monkeypatch):
+    monkeypatch.setattr(runner_module._AsyncExecutor, 'ncores_interval', 0)
+    executor = concurrent.ThreadPoolExecutor(2)
+
+    def goal(learner):
+        if learner.n >= 20:
+            executor._max_workers = 6  # scale up
+        return learner.n >= 50
+
+    learner = Learner1D(quadratic, bounds=(-1, 1))
+    runner = blocking_runner(learner, goal, executor=executor, log=True)
+    requested = [n for method, *args in runner.log
+                 if method == 'choose_points' for n in args]
+    assert runner.stats.ncores == 6
+    assert max(requested[:3]) <= 2 < max(requested)
+
+
+def test_evaluation_costs():
+    def f(x):
+        time.sleep(0.01 if x > 0 else 0)
+        return x
+
+    learner = Learner1D(f, bounds=(-1, 1), cost_aware=True)
+    runner = blocking_runner(learner, lambda l: l.n >= 20, log=True)
+    assert set(learner.costs) == set(learner.data)
+    assert all((cost > 0.01) == (x > 0) for x, cost in learner.costs.items())
+    assert ('add_cost', 1, learner.costs[1]) in runner.log
+
+    replayed = Learner1D(f, bounds=(-1, 1), cost_aware=True)
+    replay_log(replayed, runner.log)
+    assert replayed.costs == learner.costs
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    runner = blocking_runner(learner, lambda l: l.n >= 20, log=True)
+    assert not any(method == 'add_cost' for method, *_ in runner.log)
+
+
+def test_simple_records_costs():
+    def f(x):
+        time.sleep(0.01 if x > 0 else 0)
+        return x
+
+    learner = Learner1D(f, bounds=(-1, 1), cost_aware=True)
+    simple(learner, lambda l: l.n >= 10)
+    assert set(learner.costs) == set(learner.data)
+    assert all((cost > 0.01) == (x > 0) for x, cost in learner.costs.items())
+
+    learner = Learner1D(f, bounds=(-1, 1))
+    simple(learner, lambda l: l.n >= 10)
+    assert not learner.costs
+
+
+class DuckLearner:
+    """A learner that does not derive from 'BaseLearner'."""
+
+    def __init__(self):
+        self.function = quadratic
+        self.data = {}
+
+    def choose_points(self, n):
+        xs = [len(self.data) + i for i in range(n)]
+        return xs, [1] * n
+
+    def add_point(self, x, y):
+        if y is not None:
+            self.data[x] = y
+
+    def remove_unfinished(self):
+        pass
+
+
+@pytest.mark.parametrize('log', [None, []])
+def test_learner_without_costs(log):
+    learner = DuckLearner()
+    blocking_runner(learner, lambda l: len(l.data) >= 10, log=log)
+    assert len(learner.data) >= 10
+
+    learner = DuckLearner()
+    simple(learner, lambda l: len(l.data) >= 10, log=log)
+    assert len(learner.data) == 10
+
+
+def test_scheduler():
+    ioloop = asyncio.new_event_loop()
+    try:
+        scheduler = Scheduler(concurrent.ThreadPoolExecutor(4), ioloop=ioloop)
+        fast = scheduler.add(Learner1D(quadratic, bounds=(-1, 1)),
+                             lambda l: l.n >= 20, weight=3, log=True)
+        slow = scheduler.add(Learner1D(quadratic, bounds=(-1, 1)),
+                             lambda l: l.n >= 200, log=True)
+        scheduler.run_sync()
+    finally:
+        ioloop.close()
+
+    assert fast.learner.n >= 20 and slow.learner.n >= 200
+    assert fast.log[0] == ('choose_points', 3)
+    assert slow.log[0] == ('choose_points', 1)
+    # The slots of 'fast' are given to 'slow' when it is done.
+    requested = [n for method, n, *_ in slow.log if method == 'choose_points']
+    assert max(requested) > 1
+    assert not scheduler._active
+
+
+def test_scheduler_elastic_number_of_workers(monkeypatch):
+    monkeypatch.setattr(runner_module._AsyncExecutor, 'ncores_interval', 0)
+    executor = concurrent.ThreadPoolExecutor(2)
+    ioloop = asyncio.new_event_loop()
+    try:
+        scheduler = Scheduler(executor, ioloop=ioloop)
+        runners = [scheduler.add(Learner1D(quadratic, bounds=(-1, 1)),
+                                 lambda l: l.n >= 50)
+                   for _ in range(2)]
+        shares = list(scheduler._active)
+        assert [scheduler.share(s) for s in shares] == [1, 1]
+        executor._max_workers = 6  # scale up
+        assert [scheduler.share(s) for s in shares] == [3, 3]
+        scheduler.run_sync()
+    finally:
+        ioloop.close()
+    assert all(r.learner.n >= 50 for r in runners)
+
+
+def test_scheduler_loss_priority():
+    ioloop = asyncio.new_event_loop()
+    try:
+        scheduler = Scheduler(SequentialExecutor(), ioloop=ioloop,
+                              priority='loss', interval=0)
+        runners = [scheduler.add(Learner1D(quadratic, bounds=(-1, 1)),
+                                 LossGoal(tol)) for tol in (0.05, 0.01)]
+        shares = list(scheduler._active)
+        shares[0].priority, shares[1].priority = 1, 3
+        assert scheduler._divide(8) == {shares[0]: 2, shares[1]: 6}
+        # Every learner gets a slot, even when there are too few.
+        assert scheduler._divide(1) == {shares[0]: 1, shares[1]: 1}
+        scheduler.run_sync()
+    finally:
+        ioloop.close()
+    assert all(r.learner.loss() <= tol
+               for r, tol in zip(runners, (0.05, 0.01)))
+
+
+class Flaky:
+    """Raise for the first 'nfailures' evaluations of every point."""
+
+    def __init__(self, nfailures):
+        self.nfailures = nfailures
+        self.calls = collections.Counter()
+
+    def __call__(self, x):
+        self.calls[x] += 1
+        if self.calls[x] <= self.nfailures:
+            raise RuntimeError('Evaluation of {} failed'.format(x))
+        return quadratic(x)
+
+
+def test_retries():
+    f = Flaky(nfailures=2)
+    learner = Learner1D(f, bounds=(-1, 1))
+    blocking_runner(learner, lambda l: l.n >= 10, retries=2)
+    assert learner.n >= 10
+    assert all(f.calls[x] == 3 for x in learner.data)
+
+    with pytest.raises(RuntimeError):
+        blocking_runner(Learner1D(Flaky(nfailures=2), bounds=(-1, 1)),
+                        lambda l: l.n >= 10, retries=1)
+
+    learner = Learner1D(Flaky(nfailures=1), bounds=(-1, 1))
+    runner = blocking_runner(learner, lambda l: len(l.data_interp) >= 10,
+                             raise_if_retries_exceeded=False)
+    assert learner.n == 0 and len(runner.failed) >= 10
+    assert all(isinstance(e, RuntimeError) for e in runner.failed.values())
+
+
+def test_timeout():
+    def f(x):
+        if x == -1:
+            time.sleep(0.5)  # hangs
+        return quadratic(x)
+
+    executor = concurrent.ThreadPoolExecutor(2)
+    learner = Learner1D(f, bounds=(-1, 1))
+    runner = blocking_runner(learner, TimeGoal(0.2), executor=executor,
+                             timeout=0.05, raise_if_retries_exceeded=False)
+    assert -1 in runner.failed and -1 not in learner.data
+    assert isinstance(runner.failed[-1], TimeoutError)
+
+
+def test_timed_out_workers_are_freed(monkeypatch):
+    def f(x):
+        if x in (-1, 1):
+            time.sleep(0.2)  # slow, but returns eventually
+        return quadratic(x)
+
+    freed = []
+    track = Runner._track_timed_out
+    monkeypatch.setattr(Runner, '_track_timed_out',
+                        lambda self, fut, finished: track(
+                            self, fut, lambda: freed.append(1) or finished()))
+    executor = concurrent.ThreadPoolExecutor(2)
+    learner = Learner1D(f, bounds=(-1, 1))
+    runner = blocking_runner(learner, TimeGoal(0.6), executor=executor,
+                             timeout=0.05, raise_if_retries_exceeded=False)
+    assert set(runner.failed) == {-1, 1}
+    # Both workers are counted as free once the slow points returned.
+    assert len(freed) == 2
+    assert learner.n > 10
+
+
+def test_timeout_excludes_queueing():
+    def f(x):
+        time.sleep(0.02)
+        return quadratic(x)
+
+    # Most tasks wait longer than the timeout before they start.
+    executor = concurrent.ThreadPoolExecutor(2)
+    learner = Learner1D(f, bounds=(-1, 1))
+    runner = blocking_runner(learner, lambda l: l.n >= 100,
+                             executor=executor, tasks_per_core=10,
+                             timeout=0.15, retries=1,
+                             raise_if_retries_exceeded=False)
+    assert not runner.failed
+
+
+def test_speculative_resubmission():
+    calls = collections.Counter()
+    stragglers = []
+    lock = threading.Lock()
+
+    def f(x):
+        with lock:
+            calls[x] += 1
+            straggle = sum(calls.values()) == 30
+            if straggle:
+                stragglers.append(x)
+        if straggle:
+            time.sleep(1.5)  # only the first evaluation is slow
+        return quadratic(x)
+
+    def goal(learner):
+        return bool(stragglers) and stragglers[0] in learner.data
+
+    executor = concurrent.ThreadPoolExecutor(4)
+    learner = Learner1D(f, bounds=(-1, 1))
+    blocking_runner(learner, goal, executor=executor, speculate=2)
+    assert calls[stragglers[0]] == 2
@@ -26,6 +26,9 @@ class TimeLearner1D:
             points, _ = self.learner.choose_points(1)
             self.learner.add_data(points, map(f_1d, points))
 
+    def time_simple(self):
+        adaptive.runner.simple(self.learner, lambda l: l.n >= 1000)
+
 
 class TimeLearner2D:
     def setup(self):
@@ -38,6 +41,9 @@ class TimeLearner2D:
             points, _ = self.learner.choose_points(1)
             self.learner.add_data(points, map(f_2d, points))
 
+    def time_simple(self):
+        adaptive.runner.simple(self.learner, lambda l: l.n >= 50**2)
+
     def time_choose_points(self):
         for _ in range(50**2):
             self.learner.choose_points(1)